@@ -1,14 +1,18 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import orjson
 import os
+import time
 import base64
 import jwt
 import json
-from datetime import datetime, timedelta
 from io import BytesIO
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 
+from database import init_db
+
 # Import route handlers
 from routes.auth import auth_bp
 from routes.word_editor import word_editor_bp
@@ -18,11 +22,69 @@ from routes.demo import demo_bp
 # Load environment variables
 load_dotenv()
 
+# Longest Access-Control-Request-Headers value a preflight may send
+MAX_PREFLIGHT_HEADERS_LENGTH = 1024
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (same output rules as the default)"""
+
+    # Sorted keys like Flask's default; datetimes/dataclasses still go through
+    # DefaultJSONProvider.default so they serialize exactly as before
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+              | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.option)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 def create_app():
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    
+    # Create tables / set journal mode once per process
+    init_db()
+    
+    # Configure CORS; browsers may cache preflight results for a day
+    cors_origins = [o.strip() for o in os.getenv('CORS_ORIGINS', '*').split(',') if o.strip()]
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": cors_origins}},
+        methods=['GET', 'POST', 'PUT', 'DELETE'],
+        allow_headers=['Content-Type', 'Authorization'],
+        max_age=86400
+    )
     
-    # Configure CORS
-    CORS(app)
+    # Answer CORS preflights before routing; the headers never change
+    allow_any_origin = '*' in cors_origins
+    preflight_headers = {
+        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE',
+        'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+        'Access-Control-Max-Age': '86400'
+    }
+    
+    @app.before_request
+    def fast_preflight():
+        if request.method != 'OPTIONS' or not request.path.startswith('/api/'):
+            return None
+        origin = request.headers.get('Origin')
+        if not origin or 'Access-Control-Request-Method' not in request.headers:
+            return None  # Not a CORS preflight
+        # Reject oversized header lists instead of parsing them
+        if len(request.headers.get('Access-Control-Request-Headers', '')) > MAX_PREFLIGHT_HEADERS_LENGTH:
+            return '', 400
+        if not allow_any_origin and origin not in cors_origins:
+            return '', 204
+        headers = dict(preflight_headers)
+        headers['Access-Control-Allow-Origin'] = origin
+        headers['Vary'] = 'Origin'
+        return '', 204, headers
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api')
@@ -30,17 +92,17 @@ def create_app():
     app.register_blueprint(exam_prep_bp, url_prefix='/api')
     app.register_blueprint(demo_bp, url_prefix='/api')
     
-    # Basic ping endpoint
+    # Basic ping endpoint; the body only depends on startup config
+    ping_body = json.dumps({'message': os.getenv('PING_MESSAGE', 'ping')}).encode('utf-8')
+
     @app.route('/api/ping')
     def ping():
-        ping_message = os.getenv('PING_MESSAGE', 'ping')
-        return jsonify({'message': ping_message})
+        return Response(ping_body, mimetype='application/json')
     
     # Debug: List all routes
     @app.route('/api/routes', methods=['GET'])
     def list_routes():
-        routes = [str(rule) for rule in app.url_map.iter_rules()]
-        return jsonify({'routes': routes})
+        return jsonify({'routes': app.config['ROUTES']})
     
     # Error handler for 404
     @app.errorhandler(404)
@@ -50,10 +112,13 @@ def create_app():
             'error': {
                 'message': f'Route not found: {request.path}',
                 'code': 'NOT_FOUND',
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
             }
         }), 404
     
+    # The URL map is fixed once every route is registered
+    app.config['ROUTES'] = [str(rule) for rule in app.url_map.iter_rules()]
+    
     return app
 
 if __name__ == '__main__':
@@ -1,160 +1,570 @@
 import sqlite3
+import orjson
 import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 # Database file path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'studyai.db')
 
+# Connection pool: N shared read connections plus one dedicated write
+# connection, so writers never contend with each other for the file lock
+POOL_SIZE = 8
+# Opened lazily in each process: SQLite handles must not cross a fork (e.g.
+# gunicorn --preload), so a new pid gets its own connections
+_read_pool = None
+_write_pool = None
+_pool_lock = threading.Lock()
+_pool_pid = None
+_db_initialized = False
+
+# UPSERT ... RETURNING needs SQLite 3.35+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Small TTL + LRU cache for clerk_id -> user row lookups, which happen on
+# every authenticated request but rarely change
+USER_CACHE_SIZE = 4096
+USER_CACHE_TTL = 60  # seconds
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+# Cached Groq responses expire after this long, and the oldest rows are
+# dropped past the row cap
+GROQ_CACHE_TTL_DAYS = int(os.getenv('GROQ_CACHE_TTL_DAYS', '30'))
+GROQ_CACHE_MAX_ROWS = int(os.getenv('GROQ_CACHE_MAX_ROWS', '10000'))
+
+# Queued/running generation jobs that report no progress for this long died
+# with their process (restart, crash) and are marked failed
+GENERATION_JOB_TIMEOUT_MINUTES = 60
+
 def get_db_connection():
     """Get a database connection"""
-    conn = sqlite3.connect(DB_PATH)
+    # Pooled connections live for the whole process, so a larger statement
+    # cache keeps every helper's (literal, parameterized) SQL prepared
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+    # Per-connection tuning; journal_mode is persisted by init_db()
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA foreign_keys=ON')
     return conn
 
+def _fill_pools():
+    """Open this process's pooled connections on first use"""
+    global _read_pool, _write_pool, _pool_pid
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            return
+        # Connections inherited from a parent process are abandoned, never used
+        read_pool = queue.Queue(maxsize=POOL_SIZE)
+        for _ in range(POOL_SIZE):
+            read_pool.put(get_db_connection())
+        write_pool = queue.Queue(maxsize=1)
+        write_pool.put(get_db_connection())
+        _read_pool, _write_pool = read_pool, write_pool
+        _pool_pid = os.getpid()
+
+@contextmanager
+def _checkout(write):
+    if _pool_pid != os.getpid():
+        _fill_pools()
+    pool = _write_pool if write else _read_pool
+    conn = pool.get()
+    try:
+        yield conn
+    except Exception:
+        # Never hand a connection with an open transaction back to the pool
+        conn.rollback()
+        raise
+    finally:
+        pool.put(conn)
+
+def connection():
+    """Borrow a pooled read connection"""
+    return _checkout(write=False)
+
+def write_connection():
+    """Borrow the single pooled write connection"""
+    return _checkout(write=True)
+
+def _cache_get_user(clerk_id):
+    with _user_cache_lock:
+        entry = _user_cache.get(clerk_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del _user_cache[clerk_id]
+            return None
+        _user_cache.move_to_end(clerk_id)
+        return dict(user)
+
+def _cache_put_user(clerk_id, user):
+    with _user_cache_lock:
+        _user_cache[clerk_id] = (time.monotonic() + USER_CACHE_TTL, dict(user))
+        _user_cache.move_to_end(clerk_id)
+        if len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+
+def _cache_evict_user(clerk_id):
+    with _user_cache_lock:
+        _user_cache.pop(clerk_id, None)
+
+def _migrate_cascade_fks(conn):
+    """Rebuild user_sessions/user_data in place if their FKs lack ON DELETE CASCADE"""
+    stale = [
+        table for table in ('user_sessions', 'user_data')
+        if any(fk['on_delete'] != 'CASCADE' for fk in conn.execute(f'PRAGMA foreign_key_list({table})'))
+    ]
+    if not stale:
+        return
+
+    # SQLite can't ALTER a foreign key; copy into a fresh table instead.
+    # foreign_keys must be off so dropping the old table doesn't cascade.
+    conn.execute('PRAGMA foreign_keys=OFF')
+    try:
+        for table in stale:
+            schema = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()['sql']
+            new_schema = schema.replace('REFERENCES users(id)', 'REFERENCES users(id) ON DELETE CASCADE', 1)
+            new_schema = new_schema.replace(table, f'{table}_new', 1)
+            conn.execute(new_schema)
+            # Rows orphaned by earlier deletes are dropped rather than carried over
+            conn.execute(f'INSERT INTO {table}_new SELECT * FROM {table} WHERE user_id IN (SELECT id FROM users)')
+            conn.execute(f'DROP TABLE {table}')
+            conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+        conn.commit()
+    finally:
+        conn.execute('PRAGMA foreign_keys=ON')
+    print(f"Migrated {', '.join(stale)} to ON DELETE CASCADE")
+
 def init_db():
-    """Initialize the database with required tables"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id TEXT PRIMARY KEY,
-            clerk_id TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            first_name TEXT,
-            last_name TEXT,
-            full_name TEXT,
-            image_url TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create user_sessions table to track activity
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT NOT NULL,
-            session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            session_end TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    ''')
-    
-    # Create user_data table for storing additional user preferences/data
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT NOT NULL,
-            key TEXT NOT NULL,
-            value TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            UNIQUE(user_id, key)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    """Initialize the database with required tables (no-op after the first call)"""
+    global _db_initialized
+    if _db_initialized:
+        return
+    # A one-off connection, so create_app() leaves no pooled handles behind
+    # for forked workers to inherit
+    with closing(get_db_connection()) as conn:
+        # WAL lets readers run alongside the writer; the mode is stored in the file
+        conn.execute('PRAGMA journal_mode=WAL')
+        cursor = conn.cursor()
+        
+        # Create users table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                clerk_id TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                first_name TEXT,
+                last_name TEXT,
+                full_name TEXT,
+                image_url TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Create user_sessions table to track activity
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                session_end TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        ''')
+        
+        # Create user_data table for storing additional user preferences/data
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                UNIQUE(user_id, key)
+            )
+        ''')
+
+        # Exam prep: uploaded papers and generated question sets
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS papers (
+                id INTEGER PRIMARY KEY,
+                filename TEXT,
+                content TEXT,
+                uploaded_at TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS question_sets (
+                id INTEGER PRIMARY KEY,
+                questions_json BLOB,
+                generated_at TEXT
+            )
+        ''')
+
+        # Normalized Groq output keyed by a hash of model, prompt version and input
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS groq_cache (
+                key TEXT PRIMARY KEY,
+                questions_json BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Background question-generation jobs and their progress
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS generation_jobs (
+                id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                papers_total INTEGER NOT NULL,
+                papers_done INTEGER NOT NULL DEFAULT 0,
+                questions_id INTEGER,
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Groq batches still running or awaiting collection; Groq keeps them for
+        # up to 24h, so this has to outlive restarts and be visible to every worker
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS groq_batches (
+                id TEXT PRIMARY KEY,
+                batch_sizes BLOB NOT NULL,
+                questions_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Databases created before ON DELETE CASCADE need their child tables rebuilt
+        _migrate_cascade_fks(conn)
+
+        # users.clerk_id/email and user_data(user_id, key) are already served by
+        # their UNIQUE autoindexes; only user_sessions.user_id lacks one
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_sessions_user_id ON user_sessions(user_id)')
+        # Serves the groq_cache expiry and row-cap sweeps
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_groq_cache_created_at ON groq_cache(created_at)')
+
+        # Jobs left behind by a previous server run will never finish. Only
+        # stale ones are failed: other workers may still be running theirs
+        _fail_stale_generation_jobs(conn)
+
+        conn.commit()
+    _db_initialized = True
     print(f"Database initialized at {DB_PATH}")
 
 def create_or_update_user(clerk_id: str, email: str, first_name: Optional[str] = None, 
                           last_name: Optional[str] = None, full_name: Optional[str] = None,
                           image_url: Optional[str] = None) -> Dict[str, Any]:
     """Create or update a user in the database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Check if user exists by clerk_id
-    cursor.execute('SELECT id FROM users WHERE clerk_id = ?', (clerk_id,))
-    existing = cursor.fetchone()
-    
-    if existing:
-        # Update existing user
-        cursor.execute('''
-            UPDATE users 
-            SET email = ?, first_name = ?, last_name = ?, full_name = ?, 
-                image_url = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE clerk_id = ?
-        ''', (email, first_name, last_name, full_name, image_url, clerk_id))
-        user_id = existing['id']
-    else:
-        # Create new user
-        user_id = clerk_id  # Use clerk_id as the primary key
-        cursor.execute('''
-            INSERT INTO users (id, clerk_id, email, first_name, last_name, full_name, image_url)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, clerk_id, email, first_name, last_name, full_name, image_url))
-    
-    conn.commit()
-    
-    # Fetch the updated/created user
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    with write_connection() as conn:
+        cursor = conn.cursor()
+        
+        if _HAS_RETURNING:
+            # Single-statement upsert: insert, or update the existing row by clerk_id
+            cursor.execute('''
+                INSERT INTO users (id, clerk_id, email, first_name, last_name, full_name, image_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(clerk_id) DO UPDATE SET
+                    email = excluded.email, first_name = excluded.first_name,
+                    last_name = excluded.last_name, full_name = excluded.full_name,
+                    image_url = excluded.image_url, updated_at = CURRENT_TIMESTAMP
+                RETURNING *
+            ''', (clerk_id, clerk_id, email, first_name, last_name, full_name, image_url))
+            user = cursor.fetchone()
+            conn.commit()
+            _cache_evict_user(clerk_id)
+            return dict(user) if user else None
+        
+        # Check if user exists by clerk_id
+        cursor.execute('SELECT id FROM users WHERE clerk_id = ?', (clerk_id,))
+        existing = cursor.fetchone()
+        
+        if existing:
+            # Update existing user
+            cursor.execute('''
+                UPDATE users 
+                SET email = ?, first_name = ?, last_name = ?, full_name = ?, 
+                    image_url = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE clerk_id = ?
+            ''', (email, first_name, last_name, full_name, image_url, clerk_id))
+            user_id = existing['id']
+        else:
+            # Create new user
+            user_id = clerk_id  # Use clerk_id as the primary key
+            cursor.execute('''
+                INSERT INTO users (id, clerk_id, email, first_name, last_name, full_name, image_url)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, clerk_id, email, first_name, last_name, full_name, image_url))
+        
+        conn.commit()
+        
+        # Fetch the updated/created user
+        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+        user = cursor.fetchone()
     
+    _cache_evict_user(clerk_id)
     return dict(user) if user else None
 
 def get_user_by_clerk_id(clerk_id: str) -> Optional[Dict[str, Any]]:
-    """Get a user by Clerk ID"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE clerk_id = ?', (clerk_id,))
-    user = cursor.fetchone()
-    conn.close()
-    return dict(user) if user else None
+    """Get a user by Clerk ID (exactly the fields /api/get-user returns)"""
+    cached = _cache_get_user(clerk_id)
+    if cached is not None:
+        return cached
+    with connection() as conn:
+        user = conn.execute('''
+            SELECT id, clerk_id, email, full_name, first_name, last_name,
+                   image_url, created_at, updated_at
+            FROM users WHERE clerk_id = ?
+        ''', (clerk_id,)).fetchone()
+    if not user:
+        return None
+    user = dict(user)
+    _cache_put_user(clerk_id, user)
+    return user
 
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get a user by email"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-    user = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
     return dict(user) if user else None
 
 def delete_user(clerk_id: str) -> bool:
     """Delete a user from the database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM users WHERE clerk_id = ?', (clerk_id,))
-    deleted = cursor.rowcount > 0
-    conn.commit()
-    conn.close()
+    with write_connection() as conn:
+        before = conn.total_changes
+        conn.execute('DELETE FROM users WHERE clerk_id = ?', (clerk_id,))
+        deleted = conn.total_changes > before
+        if deleted:
+            conn.commit()
+        else:
+            # Nothing to write; end the implicit transaction without a WAL commit
+            conn.rollback()
+    _cache_evict_user(clerk_id)
     return deleted
 
 def set_user_data(user_id: str, key: str, value: str):
     """Set user data (preferences, settings, etc.)"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT OR REPLACE INTO user_data (user_id, key, value, updated_at)
-        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-    ''', (user_id, key, value))
-    conn.commit()
-    conn.close()
+    with write_connection() as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO user_data (user_id, key, value, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (user_id, key, value))
+        conn.commit()
+
+def set_user_data_bulk(user_id: str, items: Dict[str, Any]):
+    """Set several user data keys in a single transaction"""
+    with write_connection() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO user_data (user_id, key, value, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', [(user_id, key, str(value)) for key, value in items.items()])
+        conn.commit()
 
 def get_user_data(user_id: str, key: str) -> Optional[str]:
     """Get user data by key"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT value FROM user_data WHERE user_id = ? AND key = ?', (user_id, key))
-    result = cursor.fetchone()
-    conn.close()
+    with connection() as conn:
+        result = conn.execute('SELECT value FROM user_data WHERE user_id = ? AND key = ?', (user_id, key)).fetchone()
     return result['value'] if result else None
 
 def get_all_user_data(user_id: str) -> Dict[str, str]:
     """Get all user data for a user"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT key, value FROM user_data WHERE user_id = ?', (user_id,))
-    results = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        results = conn.execute('SELECT key, value FROM user_data WHERE user_id = ?', (user_id,)).fetchall()
     return {row['key']: row['value'] for row in results}
 
-# Initialize database on import
-init_db()
+def add_papers(filenames: List[Optional[str]], content: str) -> List[Dict[str, Any]]:
+    """Store uploaded exam papers in one transaction (missing names default to their id)"""
+    uploaded_at = datetime.utcnow().isoformat()
+    papers = []
+    with write_connection() as conn:
+        for filename in filenames:
+            cursor = conn.execute(
+                'INSERT INTO papers (filename, content, uploaded_at) VALUES (?, ?, ?)',
+                (filename, content, uploaded_at)
+            )
+            paper_id = cursor.lastrowid
+            if not filename:
+                filename = f'previous_year_paper_{paper_id}.pdf'
+                conn.execute('UPDATE papers SET filename = ? WHERE id = ?', (filename, paper_id))
+            papers.append({'id': str(paper_id), 'filename': filename})
+        conn.commit()
+    return papers
+
+def get_papers(paper_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Get uploaded exam papers by id (all papers if no ids are given)"""
+    with connection() as conn:
+        if not paper_ids:
+            rows = conn.execute('SELECT * FROM papers ORDER BY id').fetchall()
+        else:
+            ids = [int(pid) for pid in paper_ids if str(pid).isdigit()]
+            placeholders = ', '.join('?' * len(ids))
+            rows = conn.execute(f'SELECT * FROM papers WHERE id IN ({placeholders}) ORDER BY id', ids).fetchall() if ids else []
+    return [dict(row, id=str(row['id'])) for row in rows]
+
+def add_question_set(questions: List[Dict[str, Any]]) -> str:
+    """Store a generated question set and return its id"""
+    with write_connection() as conn:
+        cursor = conn.execute(
+            'INSERT INTO question_sets (questions_json, generated_at) VALUES (?, ?)',
+            (orjson.dumps(questions), datetime.utcnow().isoformat())
+        )
+        conn.commit()
+    return str(cursor.lastrowid)
+
+def get_question_set(questions_id: str) -> Optional[Dict[str, Any]]:
+    """Get a generated question set by id"""
+    if not str(questions_id).isdigit():
+        return None
+    with connection() as conn:
+        row = conn.execute(
+            'SELECT questions_json, generated_at FROM question_sets WHERE id = ?', (int(questions_id),)
+        ).fetchone()
+    if not row:
+        return None
+    return {
+        'id': str(questions_id),
+        'questions': orjson.loads(row['questions_json']),
+        'generated_at': datetime.fromisoformat(row['generated_at'])
+    }
+
+def get_cached_questions(key: str) -> Optional[List[Dict[str, Any]]]:
+    """Get cached Groq questions for a request key"""
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT questions_json FROM groq_cache WHERE key = ? AND created_at >= datetime('now', ?)",
+            (key, f'-{GROQ_CACHE_TTL_DAYS} days')
+        ).fetchone()
+    return orjson.loads(row['questions_json']) if row else None
 
+def cache_questions(key: str, questions: List[Dict[str, Any]]):
+    """Cache the normalized Groq questions for a request key"""
+    with write_connection() as conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO groq_cache (key, questions_json) VALUES (?, ?)',
+            (key, orjson.dumps(questions))
+        )
+        # Evict expired rows, then the oldest ones beyond the row cap
+        conn.execute(
+            "DELETE FROM groq_cache WHERE created_at < datetime('now', ?)",
+            (f'-{GROQ_CACHE_TTL_DAYS} days',)
+        )
+        conn.execute(
+            'DELETE FROM groq_cache WHERE key IN '
+            '(SELECT key FROM groq_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (GROQ_CACHE_MAX_ROWS,)
+        )
+        conn.commit()
+
+def clear_question_cache() -> int:
+    """Drop every cached Groq response and return how many were removed"""
+    with write_connection() as conn:
+        removed = conn.execute('DELETE FROM groq_cache').rowcount
+        conn.commit()
+    return removed
+
+def create_generation_job(papers_total: int) -> str:
+    """Record a queued question-generation job and return its id"""
+    with write_connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO generation_jobs (status, papers_total) VALUES ('queued', ?)", (papers_total,)
+        )
+        conn.commit()
+    return str(cursor.lastrowid)
+
+def update_generation_job(job_id: str, **fields):
+    """Update a generation job's status/progress columns"""
+    assignments = ', '.join(f'{column} = ?' for column in fields)
+    with write_connection() as conn:
+        conn.execute(
+            f'UPDATE generation_jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+            (*fields.values(), int(job_id))
+        )
+        conn.commit()
+
+_STALE_JOB_CONDITION = "status IN ('queued', 'running') AND updated_at < datetime('now', ?)"
+
+def _fail_stale_generation_jobs(conn, job_id: Optional[int] = None) -> int:
+    """Mark queued/running jobs with no progress within the timeout as failed"""
+    sql = ("UPDATE generation_jobs SET status = 'failed', message = ?, updated_at = CURRENT_TIMESTAMP "
+           f"WHERE {_STALE_JOB_CONDITION}")
+    params = ['Job was interrupted before it finished; please try again',
+              f'-{GENERATION_JOB_TIMEOUT_MINUTES} minutes']
+    if job_id is not None:
+        sql += ' AND id = ?'
+        params.append(job_id)
+    return conn.execute(sql, params).rowcount
+
+def get_generation_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Get a generation job by id, failing it first if it has stalled"""
+    if not str(job_id).isdigit():
+        return None
+    with connection() as conn:
+        job = conn.execute(
+            f'SELECT *, ({_STALE_JOB_CONDITION}) AS stale FROM generation_jobs WHERE id = ?',
+            (f'-{GENERATION_JOB_TIMEOUT_MINUTES} minutes', int(job_id))
+        ).fetchone()
+    if not job:
+        return None
+    if job['stale']:
+        # Only pay for the write lock once the job has actually stalled
+        with write_connection() as conn:
+            _fail_stale_generation_jobs(conn, int(job_id))
+            conn.commit()
+            job = conn.execute('SELECT * FROM generation_jobs WHERE id = ?', (int(job_id),)).fetchone()
+    job = dict(job)
+    job.pop('stale', None)
+    return job
+
+def create_groq_batch(batch_id: str, batch_sizes: Dict[str, int]):
+    """Record a queued Groq batch and how many chunks each of its requests carries"""
+    with write_connection() as conn:
+        conn.execute(
+            'INSERT INTO groq_batches (id, batch_sizes) VALUES (?, ?)', (batch_id, orjson.dumps(batch_sizes))
+        )
+        conn.commit()
+
+def get_groq_batch(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Get a queued Groq batch by id"""
+    with connection() as conn:
+        row = conn.execute(
+            'SELECT batch_sizes, questions_id FROM groq_batches WHERE id = ?', (batch_id,)
+        ).fetchone()
+    if not row:
+        return None
+    return {
+        'id': batch_id,
+        'batch_sizes': orjson.loads(row['batch_sizes']),
+        'questions_id': str(row['questions_id']) if row['questions_id'] is not None else None
+    }
+
+def store_groq_batch_questions(batch_id: str, questions: List[Dict[str, Any]]) -> str:
+    """Store a finished batch's question set once and return its id"""
+    with write_connection() as conn:
+        # IMMEDIATE takes the write lock up front, so concurrent polls from
+        # other processes cannot both see the batch as uncollected
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute('SELECT questions_id FROM groq_batches WHERE id = ?', (batch_id,)).fetchone()
+        if row and row['questions_id'] is not None:
+            conn.commit()
+            return str(row['questions_id'])
+        cursor = conn.execute(
+            'INSERT INTO question_sets (questions_json, generated_at) VALUES (?, ?)',
+            (orjson.dumps(questions), datetime.utcnow().isoformat())
+        )
+        conn.execute('UPDATE groq_batches SET questions_id = ? WHERE id = ?', (cursor.lastrowid, batch_id))
+        conn.commit()
+    return str(cursor.lastrowid)
@@ -1,10 +1,6 @@
 from flask import Blueprint, request, jsonify
-import os
-import sys
-
-# Add parent directory to path to import database
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import create_or_update_user, get_user_by_clerk_id, delete_user, get_user_data, set_user_data
+import sqlite3
+from database import create_or_update_user, get_user_by_clerk_id, delete_user, get_all_user_data, set_user_data_bulk
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -73,17 +69,7 @@ def get_user(clerk_id):
         if user:
             return jsonify({
                 'success': True,
-                'user': {
-                    'id': user['id'],
-                    'clerk_id': user['clerk_id'],
-                    'email': user['email'],
-                    'full_name': user['full_name'],
-                    'first_name': user['first_name'],
-                    'last_name': user['last_name'],
-                    'image_url': user['image_url'],
-                    'created_at': user['created_at'],
-                    'updated_at': user['updated_at']
-                }
+                'user': user
             }), 200
         else:
             return jsonify({
@@ -137,7 +123,6 @@ def user_data(clerk_id):
         
         if request.method == 'GET':
             # Get all user data
-            from database import get_all_user_data
             data = get_all_user_data(user_id)
             return jsonify({
                 'success': True,
@@ -153,8 +138,15 @@ def user_data(clerk_id):
                     'message': 'No data provided'
                 }), 400
             
-            for key, value in data.items():
-                set_user_data(user_id, key, str(value))
+            try:
+                set_user_data_bulk(user_id, data)
+            except sqlite3.IntegrityError:
+                # The user lookup is cached per process, so a user deleted by
+                # another worker can still resolve here; the FK then rejects the write
+                return jsonify({
+                    'success': False,
+                    'message': 'User not found'
+                }), 404
             
             return jsonify({
                 'success': True,
@@ -1,11 +1,15 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response
+import json
 
 demo_bp = Blueprint('demo', __name__)
 
+# The demo payload never changes, so serialize it once at import
+_DEMO_BODY = json.dumps({
+    'message': 'Hello from Flask! This is a demo endpoint.',
+    'timestamp': '2024-01-01T00:00:00Z',
+    'status': 'success'
+}).encode('utf-8')
+
 @demo_bp.route('/demo')
 def demo():
-    return jsonify({
-        'message': 'Hello from Flask! This is a demo endpoint.',
-        'timestamp': '2024-01-01T00:00:00Z',
-        'status': 'success'
-    })
+    return Response(_DEMO_BODY, mimetype='application/json')
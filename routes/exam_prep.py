@@ -1,225 +1,355 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, after_this_request
 from docx import Document
-from io import BytesIO
-from datetime import datetime
+from io import BytesIO, StringIO
 import random
 import os
 import re
+import shutil
+import blake3
 import fitz  # PyMuPDF
+import hmac
 import mammoth  # For DOCX
 import requests
 import json
+import orjson
+import logging
+import multiprocessing
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.utils import parsedate_to_datetime
+from xml.sax.saxutils import escape as xml_escape
+
+from database import (add_papers, get_papers, add_question_set, get_question_set,
+                      get_cached_questions, cache_questions, clear_question_cache,
+                      create_generation_job, update_generation_job, get_generation_job,
+                      create_groq_batch, get_groq_batch, store_groq_batch_questions)
 
 exam_prep_bp = Blueprint('exam_prep', __name__)
+logger = logging.getLogger(__name__)
 
-# Simple in-memory storage for demo
-uploaded_papers = []
-generated_questions = []
-paper_id_counter = 1
-questions_id_counter = 1
+# Papers and question sets live in SQLite (see database.py)
 
 # Groq API configuration
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_API_BASE = "https://api.groq.com/openai/v1"
+GROQ_API_URL = f"{GROQ_API_BASE}/chat/completions"
 GROQ_MODEL = "llama-3.3-70b-versatile"
+GROQ_PROMPT_VERSION = "v1"  # Bump when the prompt changes so cached answers are not reused
+# Chunk text if too large (Groq limit is ~12k tokens, roughly 8k chars)
+MAX_CHUNK_SIZE = 6000  # Smaller chunks to leave more room for complete responses
+OVERLAP_SIZE = 800  # Larger overlap to ensure questions aren't split
+
+GROQ_MAX_WORKERS = 8  # Concurrent Groq requests per document
+PAPER_MAX_WORKERS = 8  # Papers processed concurrently per request
+JOB_MAX_WORKERS = 4  # Background generation jobs run at once
+# Packing several chunks per prompt only pays off on tiers whose per-minute
+# token budget covers the larger completions, so it is opt-in
+CHUNKS_PER_REQUEST = max(1, int(os.getenv('GROQ_CHUNKS_PER_REQUEST', '1')))  # Text chunks packed into one Groq prompt
+MAX_TOKENS_PER_CHUNK = 10000  # Room for 1-3 paragraph answers per chunk
+GROQ_MAX_COMPLETION_TOKENS = 32768  # Model's completion limit
+# Per-request completion budget; keep it within the account tier's tokens per minute
+GROQ_MAX_TOKENS_PER_REQUEST = int(os.getenv('GROQ_MAX_TOKENS_PER_REQUEST', str(MAX_TOKENS_PER_CHUNK)))
+
+# Caps in-flight Groq requests process-wide, since per-paper chunk pools nest
+_groq_slots = threading.BoundedSemaphore(GROQ_MAX_WORKERS)
+
+# Runs /generate-questions jobs submitted with "async": true off the request thread
+_job_executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix='generation-job')
+
+# One pooled HTTPS session for all Groq calls so the TLS handshake is paid once
+# per connection, not once per request; the pool fits every concurrent slot
+_groq_session = requests.Session()
+_groq_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=GROQ_MAX_WORKERS))
+
+# Stay under Groq's requests-per-minute quota, and retry throttled or failed
+# calls with jittered exponential backoff instead of dropping their chunk
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv('GROQ_REQUESTS_PER_MINUTE', '30'))
+GROQ_MAX_ATTEMPTS = 5
+GROQ_MAX_BACKOFF = 60  # seconds; longer Retry-After values are not waited out
+GROQ_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class _RateLimiter:
+    """Thread-safe token bucket allowing `rate_per_minute` calls, with up to a minute's burst"""
+    
+    def __init__(self, rate_per_minute):
+        self.capacity = max(1, rate_per_minute)
+        self.tokens = float(self.capacity)
+        self.per_second = self.capacity / 60
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_second)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.per_second
+            time.sleep(wait)
+
+_groq_limiter = _RateLimiter(GROQ_REQUESTS_PER_MINUTE)
+
+# Patterns used on every chunk / question, compiled once
+_RE_3NL = re.compile(r'\n{3,}')
+_RE_SPACES = re.compile(r'  +')
+_RE_OPT = re.compile(r'\b[A-Z]\.\s')
+_RE_TAIL = re.compile(r'\b(because|when|where|which|what|how|why|the|a|an|and|or|but)\s*$', re.I)
+
+# Large PDFs are split by page range across worker processes
+PDF_PARALLEL_MIN_PAGES = 16  # Below this, process start-up costs more than it saves
+PDF_MAX_PROCESSES = min(os.cpu_count() or 1, 8)
+PDF_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT  # Same flags page.get_text() uses by default
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# Extracted text, keyed by file content hash, survives restarts here
+TEXT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.text_cache')
+# Least recently used entries are evicted once the directory grows past this
+TEXT_CACHE_MAX_BYTES = int(os.getenv('TEXT_CACHE_MAX_MB', '256')) * 1024 * 1024
+TEXT_CACHE_TMP_MAX_AGE = 3600  # seconds; older .tmp files were left behind by a crashed writer
+
+def iter_pages_text(file_path, start=0, end=None):
+    """Yield the text of each non-empty PDF page in [start, end), one page at a time"""
+    doc = fitz.open(file_path)
+    try:
+        total_pages = len(doc)
+        logger.debug("PDF opened: %d pages, encrypted=%s, needs_pass=%s, metadata=%s",
+                     total_pages, doc.is_encrypted, doc.needs_pass, doc.metadata)
+        
+        # Process ALL pages, not just first 5
+        for page_num in range(start, total_pages if end is None else min(end, total_pages)):
+            try:
+                page = doc[page_num]
+                # Build the TextPage explicitly, once, and read plain text straight from it
+                textpage = page.get_textpage(flags=PDF_TEXT_FLAGS)
+                text = textpage.extractText()
+                del textpage
+                if text.strip():
+                    yield text
+                elif logger.isEnabledFor(logging.DEBUG):
+                    # Only walk the image list when someone will read the answer
+                    logger.debug("No text extracted from page %d (%d images; scanned page?)",
+                                 page_num + 1, len(page.get_images()))
+                    
+            except Exception:
+                logger.exception("Error on page %d", page_num + 1)
+                continue
+    finally:
+        doc.close()
+
+def _extract_page_range(file_path, start, end):
+    """Worker-process entry point; fitz documents don't pickle, so each worker re-opens the file"""
+    return list(iter_pages_text(file_path, start, end))
+
+def _get_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn, not fork: the server process is multi-threaded
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_MAX_PROCESSES,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _pdf_pool
+
+def _page_ranges(total_pages, parts):
+    """Split [0, total_pages) into `parts` contiguous, near-equal ranges"""
+    size, extra = divmod(total_pages, parts)
+    start = 0
+    for k in range(parts):
+        end = start + size + (1 if k < extra else 0)
+        yield start, end
+        start = end
+
+def extract_pdf_pages(file_path):
+    """Yield the text of each non-empty PDF page, in page order"""
+    with fitz.open(file_path) as doc:
+        total_pages = len(doc)
+    if total_pages < PDF_PARALLEL_MIN_PAGES or PDF_MAX_PROCESSES < 2:
+        yield from iter_pages_text(file_path)
+        return
+    
+    global _pdf_pool
+    pool = _get_pdf_pool()
+    ranges = list(_page_ranges(total_pages, PDF_MAX_PROCESSES))
+    futures = [pool.submit(_extract_page_range, file_path, start, end) for start, end in ranges]
+    for k, future in enumerate(futures):
+        try:
+            pages = future.result()
+        except BrokenProcessPool:
+            logger.exception("PDF worker pool died; extracting the rest of %s in-process", file_path)
+            with _pdf_pool_lock:
+                if _pdf_pool is pool:
+                    _pdf_pool = None
+            yield from iter_pages_text(file_path, ranges[k][0])
+            return
+        futures[k] = None  # Let each range's pages go once they are written out
+        yield from pages
 
 def extract_text_from_file(file_path, filename):
-    """Extract text from PDF, DOCX, or TXT files"""
+    """Extract text from PDF, DOCX, or TXT files, reusing earlier extractions of identical files"""
     ext = os.path.splitext(filename)[1].lower()
     
-    print(f"Extracting text from {ext} file: {filename}")
-    print(f"File path: {file_path}")
-    print(f"File exists: {os.path.exists(file_path)}")
-    
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
-    file_size = os.path.getsize(file_path)
-    print(f"File size: {file_size} bytes")
+    # Cache keys only need to be collision-resistant, not stable identifiers;
+    # blake3 hashes large files several times faster than sha256
+    hasher = blake3.blake3()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+    digest = hasher.hexdigest()
+    # The extension is part of the key: the same bytes parse differently per type
+    cache_path = os.path.join(TEXT_CACHE_DIR, f'{digest}{ext}.txt')
+    try:
+        with open(cache_path, 'r', encoding='utf-8', errors='surrogatepass') as f:
+            logger.debug("Reusing cached text for %s", filename)
+            text = f.read()
+    except FileNotFoundError:
+        pass
+    else:
+        try:
+            os.utime(cache_path)  # Mark as recently used for pruning
+        except OSError:
+            pass
+        return text
+    
+    # Stream the extraction straight into the cache file, via temp file +
+    # rename so concurrent readers never see a partial file
+    text = None
+    tmp_path = None
+    try:
+        os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=TEXT_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w+', encoding='utf-8', errors='surrogatepass') as f:
+            _write_extracted_text(file_path, filename, ext, f)
+            f.seek(0)
+            text = f.read()
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+    except (OSError, UnicodeError) as e:
+        logger.warning("Could not cache extracted text for %s: %s", filename, e)
+    else:
+        _prune_text_cache()
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    
+    if text is None:
+        out = StringIO()
+        _write_extracted_text(file_path, filename, ext, out)
+        text = out.getvalue()
+    return text
+
+def _prune_text_cache():
+    """Delete the least recently used cached texts until the cache fits TEXT_CACHE_MAX_BYTES"""
+    now = time.time()
+    entries = []
+    total = 0
+    try:
+        with os.scandir(TEXT_CACHE_DIR) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue  # Removed by a concurrent prune
+                if entry.name.endswith('.tmp'):
+                    # Another writer may still be filling it; only reap abandoned ones
+                    if now - st.st_mtime > TEXT_CACHE_TMP_MAX_AGE:
+                        entries.append((0, st.st_size, entry.path))
+                else:
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+    except OSError as e:
+        logger.warning("Could not scan text cache: %s", e)
+        return
+    if total <= TEXT_CACHE_MAX_BYTES:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total <= TEXT_CACHE_MAX_BYTES:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not prune cached text %s: %s", path, e)
+            continue
+        total -= size
+
+def _write_extracted_text(file_path, filename, ext, out):
+    """Run the actual PDF/DOCX/TXT extraction, writing the text to file object `out`"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Extracting text from %s file: %s (%s, %d bytes)",
+                     ext, filename, file_path, os.path.getsize(file_path))
     
     try:
         if ext == '.pdf':
             # Use PyMuPDF (fitz) for PDF extraction
-            print("=" * 60)
-            print("DEBUG: Starting PDF extraction with PyMuPDF")
-            print("=" * 60)
-            
-            # Check file first
-            with open(file_path, 'rb') as f:
-                first_bytes = f.read(100)
-                print(f"First 100 bytes of file (hex): {first_bytes[:100].hex()}")
-                print(f"First 100 bytes (ascii): {first_bytes[:100]}")
-                if first_bytes.startswith(b'%PDF'):
-                    print("✓ File starts with %PDF - valid PDF header")
-                else:
-                    print("✗ File does NOT start with %PDF - may be corrupted!")
+            if logger.isEnabledFor(logging.DEBUG):
+                with open(file_path, 'rb') as f:
+                    if not f.read(4).startswith(b'%PDF'):
+                        logger.debug("File does NOT start with %%PDF - may be corrupted: %s", filename)
             
             try:
-                doc = fitz.open(file_path)
-                print(f"✓ PDF opened successfully")
-                print(f"PDF metadata:")
-                print(f"  - Page count: {len(doc)}")
-                print(f"  - Is encrypted: {doc.is_encrypted}")
-                print(f"  - Needs password: {doc.needs_pass}")
-                if doc.metadata:
-                    print(f"  - Metadata: {doc.metadata}")
-                
-                text_parts = []
-                total_chars = 0
-                total_pages = len(doc)
-                
-                # Process ALL pages, not just first 5
-                for page_num in range(total_pages):
-                    try:
-                        page = doc[page_num]
-                        print(f"\n--- Page {page_num + 1} ---")
-                        
-                        # Try different extraction methods
-                        text = page.get_text()
-                        print(f"  get_text() result: {len(text)} chars")
-                        if text:
-                            print(f"  First 200 chars: {text[:200]}")
-                        
-                        # Try get_text("text") explicitly
-                        text_alt = page.get_text("text")
-                        print(f"  get_text('text') result: {len(text_alt)} chars")
-                        
-                        # Try get_text("dict")
-                        try:
-                            text_dict = page.get_text("dict")
-                            blocks = text_dict.get("blocks", [])
-                            print(f"  Text blocks found: {len(blocks)}")
-                            for i, block in enumerate(blocks[:3]):  # First 3 blocks
-                                if "lines" in block:
-                                    print(f"    Block {i}: {len(block['lines'])} lines")
-                        except Exception as e:
-                            print(f"  Could not get text dict: {e}")
-                        
-                        # Check for images
-                        image_list = page.get_images()
-                        print(f"  Images on page: {len(image_list)}")
-                        
-                        if text.strip():
-                            text_parts.append(text)
-                            total_chars += len(text)
-                        else:
-                            print(f"  ⚠ No text extracted from page {page_num + 1}")
-                            
-                    except Exception as e:
-                        print(f"  ✗ Error on page {page_num + 1}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
+                # Pages are written as they arrive instead of being collected and joined
+                written = 0
+                for page_num, page_text in enumerate(extract_pdf_pages(file_path)):
+                    if page_num:
+                        out.write('\n\n')
+                    out.write(page_text)
+                    written += len(page_text.strip())
+                logger.debug("Extracted %d non-blank characters from %s", written, filename)
                 
-                doc.close()
+                if written < 50:
+                    # Usually a scanned/image-only PDF, a corrupted file, or a non-standard encoding
+                    logger.debug("Very little text extracted from %s", filename)
                 
-                full_text = '\n\n'.join(text_parts)
-                print("\n" + "=" * 60)
-                print(f"EXTRACTION SUMMARY:")
-                print(f"  Total pages in PDF: {total_pages}")
-                print(f"  Pages processed: {total_pages}")
-                print(f"  Pages with text: {len(text_parts)}")
-                print(f"  Total characters extracted: {len(full_text)}")
-                print(f"  Text preview (first 500 chars):")
-                print(f"  {full_text[:500]}")
-                print("=" * 60)
-                
-                if len(full_text.strip()) < 50:
-                    print("\n⚠ WARNING: Very little text extracted!")
-                    print("Possible reasons:")
-                    print("  1. PDF is image-based (scanned document)")
-                    print("  2. PDF is corrupted")
-                    print("  3. PDF text is in images, not selectable text")
-                    print("  4. PDF uses non-standard encoding")
-                
-                return full_text
-                
-            except Exception as e:
-                print(f"\n✗ ERROR opening PDF: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error opening PDF %s", filename)
                 raise
             
         elif ext in ['.docx', '.doc']:
             # Use mammoth for DOCX files
             with open(file_path, 'rb') as f:
                 result = mammoth.extract_raw_text(f)
-                return result.value
+                out.write(result.value)
             
         elif ext == '.txt':
             # Plain text file
             with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
+                shutil.copyfileobj(f, out)
         else:
             raise ValueError(f"Unsupported file type: {ext}")
             
     except Exception as e:
-        print(f"Error extracting text from {ext} file: {e}")
+        logger.debug("Error extracting text from %s file: %s", ext, e)
         raise
 
-def generate_questions_with_groq(text, filename):
-    """Generate questions using Groq API"""
-    groq_api_key = os.getenv('GROQ_API_KEY')
-    if not groq_api_key:
-        raise ValueError("GROQ_API_KEY not found in environment variables")
-    
-    # Chunk text if too large (Groq limit is ~12k tokens, roughly 8k chars)
-    # Use smart chunking to avoid splitting questions in the middle
-    MAX_CHUNK_SIZE = 6000  # Smaller chunks to leave more room for complete responses
-    OVERLAP_SIZE = 800  # Larger overlap to ensure questions aren't split
-    chunks = []
-    if len(text) > MAX_CHUNK_SIZE:
-        print(f"Text too large ({len(text)} chars), chunking with smart boundaries...")
-        i = 0
-        while i < len(text):
-            chunk_end = min(i + MAX_CHUNK_SIZE, len(text))
-            chunk = text[i:chunk_end]
-            
-            # Try to end chunk at a good boundary to avoid splitting questions
-            if chunk_end < len(text):
-                # Look for question endings first (most important)
-                last_question_mark = chunk.rfind('?')
-                # Then look for double newlines (question separators)
-                last_double_newline = chunk.rfind('\n\n')
-                # Then look for single newlines
-                last_newline = chunk.rfind('\n')
-                # Then periods
-                last_period = chunk.rfind('.')
-                
-                # Prefer question marks, then double newlines, then single newlines, then periods
-                boundary = -1
-                if last_question_mark > chunk_end - 1000:  # Within 1000 chars of end
-                    boundary = last_question_mark
-                elif last_double_newline > chunk_end - 800:
-                    boundary = last_double_newline
-                elif last_newline > chunk_end - 500:
-                    boundary = last_newline
-                elif last_period > chunk_end - 300:
-                    boundary = last_period
-                
-                if boundary > chunk_end - 1000:  # If we found a good boundary
-                    chunk = chunk[:boundary + 1]
-                    i = i + boundary + 1 - OVERLAP_SIZE  # Overlap from previous chunk
-                    print(f"  Chunk boundary at position {boundary} (question mark/newline)")
-                else:
-                    # No good boundary found, use standard overlap
-                    i = chunk_end - OVERLAP_SIZE
-            else:
-                i = chunk_end
-            
-            if chunk.strip():
-                chunks.append(chunk.strip())
-        print(f"Split into {len(chunks)} chunks with smart boundaries")
+def _build_groq_payload(batch):
+    """Build the chat-completion request body for a batch of text chunks"""
+    if len(batch) == 1:
+        content = batch[0]
+        batch_instructions = ''
     else:
-        chunks = [text]
-    
-    all_questions = []
+        # Row-marshal several chunks into one prompt, tagged so the model can
+        # answer per chunk
+        content = '\n\n'.join(f'### CHUNK {idx} ###\n{chunk}' for idx, chunk in enumerate(batch))
+        batch_instructions = (
+            f"\n\nThe document content below is split into {len(batch)} chunks, each starting with a "
+            f"'### CHUNK <id> ###' header. Instead of a flat array, return a JSON array with one object "
+            f"per chunk: {{\"chunk_id\": <id>, \"questions\": [<question objects as described above>]}}."
+        )
     
-    for i, chunk in enumerate(chunks):
-        print(f"Processing chunk {i + 1}/{len(chunks)}...")
-        
-        prompt = f"""Extract important questions from this document content and GENERATE comprehensive answers based on the document.
+    prompt = f"""Extract important questions from this document content and GENERATE comprehensive answers based on the document.
 
 CRITICAL INSTRUCTIONS - READ CAREFULLY:
 1. Extract COMPLETE questions with ALL parts:
@@ -268,200 +398,448 @@ Return a JSON array of objects with these fields:
 - difficulty: "easy" | "medium" | "hard"
 - confidence: number (0-1)
 
-Return ONLY valid JSON array, no markdown, no explanations.
+Return ONLY valid JSON array, no markdown, no explanations.{batch_instructions}
 
 Document content:
-{chunk}"""
+{content}"""
+    
+    return {
+        'model': GROQ_MODEL,
+        'messages': [
+            {
+                'role': 'system',
+                'content': 'You are an expert at extracting COMPLETE educational questions from documents and GENERATING comprehensive answers. CRITICAL: (1) Always include the FULL question text with ALL multiple choice options (A, B, C, D, etc.), complete sentences, and all parts of the question. Never truncate or cut off questions. (2) ALWAYS generate detailed answers based on the document content - never return "Answer not provided". For multiple choice questions, provide the correct option and explanation. For open-ended questions, provide comprehensive answers based on the document. Return only valid JSON arrays.'
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ],
+        'temperature': 0.3,
+        'max_tokens': min(MAX_TOKENS_PER_CHUNK * len(batch), GROQ_MAX_TOKENS_PER_REQUEST, GROQ_MAX_COMPLETION_TOKENS)
+    }
+
+_json_decoder = json.JSONDecoder()
+
+def _decode_array_prefix(s, start):
+    """Decode the complete elements of a possibly truncated JSON array opening at s[start]"""
+    items = []
+    pos = start + 1
+    while True:
+        while pos < len(s) and s[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(s) or s[pos] == ']':
+            return items
+        try:
+            item, pos = _json_decoder.raw_decode(s, pos)
+        except json.JSONDecodeError:
+            return items  # Stop at the element that was cut off
+        items.append(item)
+
+def normalize_question(q):
+    """Normalize one question object from Groq, or return None if it is not usable"""
+    if not isinstance(q, dict):
+        return None
+    question_text = str(q.get('question') or q.get('Question') or '').strip()
+    if len(question_text) <= 10:
+        return None
+    
+    answer_text = str(q.get('answer') or q.get('Answer') or q.get('solution') or '').strip()
+    # If answer is empty or says "not provided", generate a placeholder
+    answer_lower = answer_text.lower()
+    if not answer_text or 'not provided' in answer_lower or 'answer not' in answer_lower:
+        answer_text = 'Answer will be generated based on document content.'
+    
+    # Enum-like fields repeat across every question; intern them so they share one object
+    return {
+        'question': question_text,
+        'answer': answer_text,
+        'importance': sys.intern(str(q.get('importance') or q.get('Importance') or 'medium').lower()),
+        'topic': sys.intern(str(q.get('topic') or q.get('Topic') or 'General')),
+        'difficulty': sys.intern(str(q.get('difficulty') or q.get('Difficulty') or 'medium').lower()),
+        'confidence': float(q.get('confidence', q.get('Confidence', 0.8)))
+    }
+
+def _log_incomplete_questions(questions):
+    """Debug-only pass flagging questions that look cut off"""
+    for q_idx, q in enumerate(questions):
+        question_text = q['question']
+        question_lower = question_text.lower()
+        incomplete_reason = ""
+        
+        # Check 1: Ends with incomplete words
+        if len(question_text) > 50 and not question_text[-1] in '.?!:\n' and not question_text.endswith('...'):
+            if _RE_TAIL.search(question_text[-50:]):
+                incomplete_reason = f"ends with incomplete phrase: ...{question_text[-40:]}"
+        
+        # Check 2: Question mentions options but doesn't show them
+        if 'option' in question_lower or 'choose' in question_lower or 'select' in question_lower:
+            if not _RE_OPT.search(question_text) and len(question_text) < 200:
+                incomplete_reason = "mentions options but options not included"
+        
+        # Check 3: Ends with "because" with no blank after it
+        if question_text.endswith('because'):
+            incomplete_reason = "ends with 'because' but no blank or continuation"
         
+        if incomplete_reason:
+            logger.debug("Question %d may be incomplete: %s\n   Full question: %s...",
+                         q_idx + 1, incomplete_reason, question_text[:150])
+
+def _questions_from_response(i, batch_size, data):
+    """Parse and normalize the questions in one Groq chat-completion response body
+
+    Returns (questions, complete); complete is False when the response was cut
+    off or its JSON had to be salvaged, so the result should not be cached.
+    """
+    response_content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
+    
+    # Check if response was truncated
+    finish_reason = data.get('choices', [{}])[0].get('finish_reason', '')
+    complete = finish_reason != 'length'
+    if not complete:
+        print(f"⚠ WARNING: Groq response was truncated (hit max_tokens limit) for request {i + 1}")
+        print(f"Response length: {len(response_content)} characters")
+        print(f"This means some questions may be incomplete. Consider using smaller chunks.")
+        
+        # Try to extract what we can, but warn about truncation
+        # The JSON might be incomplete, so we need to handle that
+    
+    if not response_content:
+        print(f"No content in Groq response for request {i + 1}")
+        return [], False
+    
+    print(f"Groq response length: {len(response_content)} characters")
+    print(f"Response preview (first 300 chars): {response_content[:300]}")
+    
+    # Parse JSON from response
+    json_string = response_content.strip()
+    
+    # Remove markdown code blocks if present
+    if json_string.startswith('```'):
+        json_string = json_string.replace('```json', '').replace('```', '').strip()
+    
+    # Try to find JSON array in response
+    if '[' not in json_string:
+        raise ValueError("No JSON array found in Groq response")
+    start = json_string.index('[')
+    # If response was truncated, the closing bracket might be missing
+    end = json_string.rfind(']') + 1
+    try:
+        if end <= start:
+            raise ValueError("missing closing bracket")
+        questions = orjson.loads(json_string[start:end])
+    except ValueError as e:
+        # Truncated mid-JSON: keep every array element that did arrive complete
+        print(f"⚠ JSON parsing error: {e}")
+        print(f"JSON string length: {len(json_string)}")
+        print(f"JSON string end: ...{json_string[-500:]}")
+        questions = _decode_array_prefix(json_string, start)
+        complete = False
+        if not questions:
+            raise ValueError(f"Failed to parse JSON from Groq response: {e}")
+        print(f"Recovered {len(questions)} complete item(s) from incomplete JSON")
+    
+    if not isinstance(questions, list):
+        print(f"Groq returned non-array for request {i + 1}")
+        return [], False
+    
+    # Batched prompts answer with one {"chunk_id", "questions"} object per
+    # chunk; flatten them (a flat array is accepted too)
+    if batch_size > 1:
+        questions = [
+            q
+            for entry in questions if isinstance(entry, dict)
+            for q in (entry['questions'] if isinstance(entry.get('questions'), list) else [entry])
+        ]
+    
+    # Normalize questions, dropping invalid rows
+    chunk_questions = list(filter(None, map(normalize_question, questions)))
+    if logger.isEnabledFor(logging.DEBUG):
+        _log_incomplete_questions(chunk_questions)
+    
+    print(f"✓ Got {len(questions)} questions from request {i + 1}")
+    
+    return chunk_questions, complete
+
+def _retry_after(response):
+    """Seconds the server asked us to wait, from a Retry-After header (seconds or HTTP date)"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _groq_request(method, url, rate_limited=False, **kwargs):
+    """Call the Groq API on the shared session, retrying 429/5xx and connection errors"""
+    for attempt in range(1, GROQ_MAX_ATTEMPTS + 1):
+        if rate_limited:
+            _groq_limiter.acquire()
         try:
-            response = requests.post(
+            response = _groq_session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == GROQ_MAX_ATTEMPTS:
+                raise
+            delay = None
+            reason = str(e)
+        else:
+            if response.status_code not in GROQ_RETRY_STATUSES or attempt == GROQ_MAX_ATTEMPTS:
+                return response
+            delay = _retry_after(response)
+            if delay is not None and delay > GROQ_MAX_BACKOFF:
+                return response  # Quota won't free up soon; fail now rather than stall the request
+            reason = f"HTTP {response.status_code}"
+        if delay is None:
+            delay = min(GROQ_MAX_BACKOFF, 2 ** (attempt - 1)) + random.uniform(0, 1)
+        print(f"Groq request failed ({reason}); retry {attempt}/{GROQ_MAX_ATTEMPTS - 1} in {delay:.1f}s")
+        time.sleep(delay)
+
+def _cache_key(batch):
+    """Content hash identifying a Groq request for the response cache"""
+    material = '\0'.join((GROQ_MODEL, GROQ_PROMPT_VERSION, *batch))
+    return blake3.blake3(material.encode('utf-8')).hexdigest()
+
+def _process_batch(i, total, batch, groq_api_key):
+    """Send a batch of text chunks to Groq in one request and return their normalized questions"""
+    print(f"Processing request {i + 1}/{total} ({len(batch)} chunk(s))...")
+    
+    try:
+        key = _cache_key(batch)
+        cached = get_cached_questions(key)
+        if cached is not None:
+            print(f"✓ Reused {len(cached)} cached questions for request {i + 1}")
+            return cached
+        
+        with _groq_slots:
+            response = _groq_request(
+                'POST',
                 GROQ_API_URL,
+                rate_limited=True,
                 headers={
                     'Content-Type': 'application/json',
                     'Authorization': f'Bearer {groq_api_key}'
                 },
-                json={
-                    'model': GROQ_MODEL,
-                    'messages': [
-                    {
-                        'role': 'system',
-                        'content': 'You are an expert at extracting COMPLETE educational questions from documents and GENERATING comprehensive answers. CRITICAL: (1) Always include the FULL question text with ALL multiple choice options (A, B, C, D, etc.), complete sentences, and all parts of the question. Never truncate or cut off questions. (2) ALWAYS generate detailed answers based on the document content - never return "Answer not provided". For multiple choice questions, provide the correct option and explanation. For open-ended questions, provide comprehensive answers based on the document. Return only valid JSON arrays.'
-                    },
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ],
-                    'temperature': 0.3,
-                    'max_tokens': 10000  # Increased to allow for longer answers (1-3 paragraphs based on importance)
-                },
+                json=_build_groq_payload(batch),
                 timeout=60
             )
-            
-            if not response.ok:
-                error_data = response.json()
-                print(f"Groq API error: {error_data}")
-                raise Exception(f"Groq API error: {error_data.get('error', {}).get('message', 'Unknown error')}")
-            
-            data = response.json()
-            response_content = data.get('choices', [{}])[0].get('message', {}).get('content', '')
-            
-            # Check if response was truncated
-            finish_reason = data.get('choices', [{}])[0].get('finish_reason', '')
-            if finish_reason == 'length':
-                print(f"⚠ WARNING: Groq response was truncated (hit max_tokens limit) for chunk {i + 1}")
-                print(f"Response length: {len(response_content)} characters")
-                print(f"This means some questions may be incomplete. Consider using smaller chunks.")
-                
-                # Try to extract what we can, but warn about truncation
-                # The JSON might be incomplete, so we need to handle that
-            
-            if not response_content:
-                print(f"No content in Groq response for chunk {i + 1}")
-                continue
-            
-            print(f"Groq response length: {len(response_content)} characters")
-            print(f"Response preview (first 300 chars): {response_content[:300]}")
-            
-            # Parse JSON from response
-            json_string = response_content.strip()
-            
-            # Remove markdown code blocks if present
-            if json_string.startswith('```'):
-                json_string = json_string.replace('```json', '').replace('```', '').strip()
-            
-            # Try to find JSON array in response
-            json_match = None
-            if '[' in json_string:
-                start = json_string.index('[')
-                # If response was truncated, the closing bracket might be missing
-                if ']' in json_string:
-                    end = json_string.rindex(']') + 1
-                    json_string = json_string[start:end]
-                else:
-                    # Response was truncated mid-JSON, try to fix it
-                    print(f"⚠ JSON response appears incomplete (missing closing bracket)")
-                    # Try to find the last complete question object
-                    # Look for the last complete } before the end
-                    last_brace = json_string.rfind('}')
-                    if last_brace > start:
-                        json_string = json_string[start:last_brace + 1] + ']'
-                        print(f"Attempting to fix incomplete JSON...")
-                    else:
-                        raise ValueError("JSON response is too incomplete to parse")
-            
-            try:
-                questions = json.loads(json_string)
-            except json.JSONDecodeError as e:
-                print(f"⚠ JSON parsing error: {e}")
-                print(f"JSON string length: {len(json_string)}")
-                print(f"JSON string preview: {json_string[:500]}...")
-                print(f"JSON string end: ...{json_string[-500:]}")
-                # Try to extract partial questions if possible
-                raise ValueError(f"Failed to parse JSON from Groq response: {e}")
-            
-            if not isinstance(questions, list):
-                print(f"Groq returned non-array for chunk {i + 1}")
-                continue
-            
-            # Normalize questions
-            for q_idx, q in enumerate(questions):
-                question_text = str(q.get('question', q.get('Question', ''))).strip()
-                answer_text = str(q.get('answer', q.get('Answer', q.get('solution', '')))).strip()
-                # If answer is empty or says "not provided", generate a placeholder
-                if not answer_text or 'not provided' in answer_text.lower() or 'answer not' in answer_text.lower():
-                    answer_text = 'Answer will be generated based on document content.'
-                
-                # Check if question seems incomplete
-                if question_text:
-                    # Check if question ends abruptly (no punctuation, or ends with incomplete word)
-                    is_incomplete = False
-                    incomplete_reason = ""
-                    
-                    # Check 1: Ends with incomplete words
-                    if len(question_text) > 50 and not question_text[-1] in '.?!:\n' and not question_text.endswith('...'):
-                        last_50 = question_text[-50:].lower()
-                        if any(word in last_50 for word in ['because', 'when', 'where', 'which', 'what', 'how', 'why', 'the', 'a ', 'an ', 'and ', 'or ', 'but ']):
-                            is_incomplete = True
-                            incomplete_reason = f"ends with incomplete phrase: ...{question_text[-40:]}"
-                    
-                    # Check 2: Question mentions options but doesn't show them
-                    if 'option' in question_text.lower() or 'choose' in question_text.lower() or 'select' in question_text.lower():
-                        # Check if it has A., B., C., D. patterns
-                        has_options = bool(re.search(r'\b[A-Z]\.\s', question_text))
-                        if not has_options and len(question_text) < 200:
-                            is_incomplete = True
-                            incomplete_reason = "mentions options but options not included"
-                    
-                    # Check 3: Ends with "because" or "because ________"
-                    if question_text.rstrip().endswith('because') or question_text.rstrip().endswith('because ________') or question_text.rstrip().endswith('because _____'):
-                        # This might be intentional (fill-in-the-blank), but check if it's cut off
-                        if not question_text.rstrip().endswith('________') and not question_text.rstrip().endswith('_____'):
-                            is_incomplete = True
-                            incomplete_reason = "ends with 'because' but no blank or continuation"
-                    
-                    if is_incomplete:
-                        print(f"⚠ Question {q_idx + 1} may be incomplete: {incomplete_reason}")
-                        print(f"   Full question: {question_text[:150]}...")
-                
-                normalized = {
-                    'question': question_text,
-                    'answer': answer_text,
-                    'importance': str(q.get('importance', q.get('Importance', 'medium'))).lower(),
-                    'topic': str(q.get('topic', q.get('Topic', 'General'))),
-                    'difficulty': str(q.get('difficulty', q.get('Difficulty', 'medium'))).lower(),
-                    'confidence': float(q.get('confidence', q.get('Confidence', 0.8)))
-                }
-                
-                # Only add if question is valid
-                if normalized['question'] and len(normalized['question']) > 10:
-                    all_questions.append(normalized)
-                    # Log question length for debugging
-                    if len(normalized['question']) < 100:
-                        print(f"  ✓ Question {q_idx + 1}: {len(normalized['question'])} chars - {normalized['question'][:60]}...")
-                else:
-                    print(f"  ✗ Skipped invalid question {q_idx + 1}: {normalized['question'][:50] if normalized['question'] else 'empty'}")
-            
-            print(f"✓ Got {len(questions)} questions from chunk {i + 1}")
-            
-        except Exception as e:
-            print(f"Error processing chunk {i + 1}: {e}")
-            continue
+        
+        if not response.ok:
+            error_data = response.json()
+            print(f"Groq API error: {error_data}")
+            raise Exception(f"Groq API error: {error_data.get('error', {}).get('message', 'Unknown error')}")
+        
+        questions, complete = _questions_from_response(i, len(batch), response.json())
+        # Truncated or salvaged output is missing questions; never pin it in the cache
+        if questions and complete:
+            cache_questions(key, questions)
+        return questions
+        
+    except Exception as e:
+        print(f"Error processing request {i + 1}: {e}")
+        return []
+
+# Boundary markers in priority order, each only accepted within this many chars of the chunk end
+_BOUNDARY_WINDOWS = (
+    ('?', 1000),  # Question endings first (most important)
+    ('\n\n', 800),  # Then double newlines (question separators)
+    ('\n', 500),  # Then single newlines
+    ('.', 300),  # Then periods
+)
+
+def _find_boundary(s):
+    """Index of the best place to end chunk `s`, or -1 if none is close enough to its end"""
+    n = len(s)
+    for marker, lookback in _BOUNDARY_WINDOWS:
+        # Only search the tail window instead of rescanning the whole chunk
+        pos = s.rfind(marker, max(0, n - lookback + 1))
+        if pos >= 0:
+            return pos
+    return -1
+
+def _split_into_chunks(text):
+    """Split document text into overlapping chunks that end on question boundaries where possible"""
+    if len(text) <= MAX_CHUNK_SIZE:
+        return [text]
+    
+    # Use smart chunking to avoid splitting questions in the middle
+    print("Text too large, chunking with smart boundaries...")
+    chunks = []
+    start = 0
+    while start < len(text):
+        chunk_end = min(start + MAX_CHUNK_SIZE, len(text))
+        chunk = text[start:chunk_end]
+        
+        # Try to end chunk at a good boundary to avoid splitting questions
+        if chunk_end < len(text):
+            boundary = _find_boundary(chunk)
+            if boundary >= 0:  # If we found a good boundary
+                chunk = chunk[:boundary + 1]
+                next_start = start + boundary + 1 - OVERLAP_SIZE  # Overlap from previous chunk
+                print(f"  Chunk boundary at position {start + boundary} (question mark/newline)")
+            else:
+                # No good boundary found, use standard overlap
+                next_start = chunk_end - OVERLAP_SIZE
+        else:
+            next_start = chunk_end
+        
+        if chunk.strip():
+            chunks.append(chunk.strip())
+        start = next_start
+    print(f"Split into {len(chunks)} chunks with smart boundaries")
+    return chunks
+
+def _pack_batches(chunks):
+    """Group consecutive chunks into the batches sent as single Groq prompts"""
+    return [chunks[i:i + CHUNKS_PER_REQUEST] for i in range(0, len(chunks), CHUNKS_PER_REQUEST)]
+
+def generate_questions_with_groq(text, filename):
+    """Generate questions using Groq API"""
+    groq_api_key = os.getenv('GROQ_API_KEY')
+    if not groq_api_key:
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+    
+    chunks = _split_into_chunks(text)
+    
+    # Pack consecutive chunks into shared requests to save the per-call prompt
+    # overhead, then send the requests concurrently; results are still
+    # collected in document order
+    batches = _pack_batches(chunks)
+    all_questions = []
+    with ThreadPoolExecutor(max_workers=max(1, min(GROQ_MAX_WORKERS, len(batches)))) as executor:
+        futures = [
+            executor.submit(_process_batch, i, len(batches), batch, groq_api_key)
+            for i, batch in enumerate(batches)
+        ]
+        for future in futures:
+            all_questions.extend(future.result())
     
     return all_questions
 
+def _load_paper_text(paper):
+    """Extract and clean the text of one uploaded paper (None if its file is missing)"""
+    filename = paper.get('filename', 'unknown')
+    
+    # Get file path from paper data
+    file_path = paper.get('filePath')
+    if not file_path or not os.path.exists(file_path):
+        print(f"File not found: {file_path}")
+        return None
+    
+    # Step 1: Extract text from file
+    print(f"Reading file: {file_path}")
+    extracted_text = extract_text_from_file(file_path, filename)
+    
+    print(f"Extracted text length: {len(extracted_text) if extracted_text else 0}")
+    if extracted_text:
+        print(f"Extracted text preview (first 500 chars): {extracted_text[:500]}")
+    
+    if not extracted_text or len(extracted_text.strip()) < 50:
+        print(f"ERROR: Insufficient text extracted from {filename}")
+        print(f"Text length: {len(extracted_text) if extracted_text else 0}")
+        print("This PDF might be corrupted, scanned (image-based), or encrypted.")
+        print("Trying to continue anyway...")
+        # Don't continue - try to process with what we have
+        if not extracted_text or len(extracted_text.strip()) < 10:
+            raise ValueError(f"Could not extract any readable text from {filename}. The PDF may be corrupted, scanned (image-based), or encrypted.")
+    
+    print(f"✓ Extracted {len(extracted_text)} characters")
+    
+    # Step 2: Simple cleanup
+    clean_text = _RE_3NL.sub('\n\n', extracted_text)
+    clean_text = _RE_SPACES.sub(' ', clean_text).strip()
+    print(f"Cleaned text: {len(clean_text)} characters")
+    return clean_text
+
+def _process_paper(paper):
+    """Extract text from one uploaded paper and generate its questions"""
+    filename = paper.get('filename', 'unknown')
+    print(f"\n=== Processing: {filename} ===")
+    
+    try:
+        clean_text = _load_paper_text(paper)
+        if clean_text is None:
+            return []
+        
+        # Step 3: Generate questions using Groq
+        print("Sending to Groq AI for question generation...")
+        questions = generate_questions_with_groq(clean_text, filename)
+        
+        if questions:
+            print(f"✓ Generated {len(questions)} questions from {filename}")
+        else:
+            print(f"No questions generated from {filename}")
+        return questions
+            
+    except Exception as e:
+        print(f"Error processing {filename}: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+
+def _generate_for_papers(papers_data, on_paper_done=None):
+    """Generate questions for every paper, in request order"""
+    # Papers are independent: extraction (PyMuPDF releases the GIL) and
+    # Groq calls for different papers overlap; results keep request order
+    all_questions = []
+    with ThreadPoolExecutor(max_workers=min(PAPER_MAX_WORKERS, len(papers_data))) as executor:
+        for done, questions in enumerate(executor.map(_process_paper, papers_data), 1):
+            all_questions.extend(questions)
+            if on_paper_done:
+                on_paper_done(done)
+    return all_questions
+
+def _run_generation_job(job_id, papers_data):
+    """Background worker for an async /generate-questions job"""
+    try:
+        update_generation_job(job_id, status='running')
+        all_questions = _generate_for_papers(
+            papers_data,
+            on_paper_done=lambda done: update_generation_job(job_id, papers_done=done)
+        )
+        if not all_questions:
+            update_generation_job(job_id, status='failed',
+                                  message='No questions could be generated from the uploaded papers')
+            return
+        update_generation_job(job_id, status='completed', questions_id=int(_store_questions(all_questions)),
+                              message=f'Generated {len(all_questions)} questions from {len(papers_data)} papers')
+    except Exception as e:
+        print(f"Generation job {job_id} error: {e}")
+        import traceback
+        traceback.print_exc()
+        update_generation_job(job_id, status='failed', message=f'Failed to generate questions: {str(e)}')
+
+def _store_questions(all_questions):
+    """Record a generated question set for later download and return its id"""
+    return add_question_set(all_questions)
+
 @exam_prep_bp.route('/test', methods=['GET'])
 def test():
     """Test endpoint to verify the blueprint is working"""
     return jsonify({
         'success': True,
         'message': 'Exam prep blueprint is working!',
-        'routes': ['/upload-papers', '/generate-questions', '/download-questions']
+        'routes': ['/upload-papers', '/generate-questions', '/generate-questions-status', '/generate-questions-batch', '/batch-status', '/download-questions', '/clear-cache']
     })
 
 @exam_prep_bp.route('/upload-papers', methods=['POST'])
 def upload_papers():
-    global paper_id_counter
     try:
         # For demo purposes, simulate uploading previous year papers
         # In production, integrate with Google Drive API
         
         data = request.get_json()
         files = data.get('files', []) if data else []
-        uploaded_files = []
 
         # Simulate processing files
-        for file in files:
-            paper = {
-                'id': str(paper_id_counter),
-                'filename': file.get('filename', f'previous_year_paper_{paper_id_counter}.pdf'),
-                'content': "Sample question paper content",  # In production, extract from actual files
-                'uploaded_at': datetime.utcnow()
-            }
-            
-            uploaded_papers.append(paper)
-            uploaded_files.append(paper)
-            paper_id_counter += 1
+        uploaded_files = add_papers(
+            [file.get('filename') for file in files],
+            "Sample question paper content"  # In production, extract from actual files
+        )
 
         return jsonify({
             'success': True,
@@ -486,15 +864,20 @@ def generate_questions():
     
     try:
         data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'message': 'Request body must be a JSON object'
+            }), 400
         
         # Get papers from request (passed from Node.js backend)
-        papers_data = data.get('papers', []) if data else []
+        papers_data = data.get('papers', [])
         print(f'Received {len(papers_data)} papers from Node.js backend')
         
         # Fallback: if papers not provided, try to get from paperIds
         if not papers_data:
-            paper_ids = data.get('paperIds', []) if data else []
-            papers_data = [p for p in uploaded_papers if not paper_ids or p['id'] in paper_ids]
+            paper_ids = data.get('paperIds', [])
+            papers_data = get_papers(paper_ids)
         
         print(f"Generating questions for {len(papers_data)} papers")
         
@@ -504,59 +887,19 @@ def generate_questions():
                 'message': 'No papers found'
             }), 404
         
-        all_questions = []
+        # Long generations can run in the background; the caller polls
+        # /generate-questions-status/<jobId> instead of holding this request open
+        if data.get('async'):
+            job_id = create_generation_job(len(papers_data))
+            _job_executor.submit(_run_generation_job, job_id, papers_data)
+            return jsonify({
+                'success': True,
+                'message': f'Queued question generation for {len(papers_data)} papers',
+                'jobId': job_id,
+                'status': 'queued'
+            }), 202
         
-        # Process each paper
-        for paper in papers_data:
-            filename = paper.get('filename', 'unknown')
-            print(f"\n=== Processing: {filename} ===")
-            
-            # Get file path from paper data
-            file_path = paper.get('filePath')
-            if not file_path or not os.path.exists(file_path):
-                print(f"File not found: {file_path}")
-                continue
-            
-            try:
-                # Step 1: Extract text from file
-                print(f"Reading file: {file_path}")
-                extracted_text = extract_text_from_file(file_path, filename)
-                
-                print(f"Extracted text length: {len(extracted_text) if extracted_text else 0}")
-                if extracted_text:
-                    print(f"Extracted text preview (first 500 chars): {extracted_text[:500]}")
-                
-                if not extracted_text or len(extracted_text.strip()) < 50:
-                    print(f"ERROR: Insufficient text extracted from {filename}")
-                    print(f"Text length: {len(extracted_text) if extracted_text else 0}")
-                    print("This PDF might be corrupted, scanned (image-based), or encrypted.")
-                    print("Trying to continue anyway...")
-                    # Don't continue - try to process with what we have
-                    if not extracted_text or len(extracted_text.strip()) < 10:
-                        raise ValueError(f"Could not extract any readable text from {filename}. The PDF may be corrupted, scanned (image-based), or encrypted.")
-                
-                print(f"✓ Extracted {len(extracted_text)} characters")
-                
-                # Step 2: Simple cleanup
-                clean_text = re.sub(r'\n{3,}', '\n\n', extracted_text)
-                clean_text = re.sub(r'  +', ' ', clean_text).strip()
-                print(f"Cleaned text: {len(clean_text)} characters")
-                
-                # Step 3: Generate questions using Groq
-                print("Sending to Groq AI for question generation...")
-                questions = generate_questions_with_groq(clean_text, filename)
-                
-                if questions:
-                    all_questions.extend(questions)
-                    print(f"✓ Generated {len(questions)} questions from {filename}")
-                else:
-                    print(f"No questions generated from {filename}")
-                    
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
+        all_questions = _generate_for_papers(papers_data)
         
         if not all_questions:
             return jsonify({
@@ -564,16 +907,7 @@ def generate_questions():
                 'message': 'No questions could be generated from the uploaded papers'
             }), 500
         
-        # Create questions record
-        global questions_id_counter
-        questions_record = {
-            'id': str(questions_id_counter),
-            'questions': all_questions,
-            'generated_at': datetime.utcnow()
-        }
-        
-        generated_questions.append(questions_record)
-        questions_id_counter += 1
+        _store_questions(all_questions)
         
         print(f"\n✓ Total: {len(all_questions)} questions generated")
         
@@ -592,11 +926,279 @@ def generate_questions():
             'message': f'Failed to generate questions: {str(e)}'
         }), 500
 
+@exam_prep_bp.route('/generate-questions-status/<job_id>')
+def generate_questions_status(job_id):
+    """Report progress of a background /generate-questions job, with its questions once done"""
+    try:
+        job = get_generation_job(job_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'message': 'Job not found'
+            }), 404
+        
+        result = {
+            'success': job['status'] != 'failed',
+            'jobId': job_id,
+            'status': job['status'],
+            'progress': {'papersDone': job['papers_done'], 'papersTotal': job['papers_total']},
+            'message': job['message']
+        }
+        if job['status'] == 'completed':
+            result['questionsId'] = str(job['questions_id'])
+            result['questions'] = get_question_set(job['questions_id'])['questions']
+        return jsonify(result), 500 if job['status'] == 'failed' else 200
+    
+    except Exception as e:
+        print(f"Generate questions status error: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to check job status: {str(e)}'
+        }), 500
+
+@exam_prep_bp.route('/generate-questions-batch', methods=['POST'])
+def generate_questions_batch():
+    """Queue question generation through Groq's Batch API (cheaper; results within 24h)"""
+    try:
+        groq_api_key = os.getenv('GROQ_API_KEY')
+        if not groq_api_key:
+            raise ValueError("GROQ_API_KEY not found in environment variables")
+        
+        data = request.get_json()
+        papers_data = data.get('papers', []) if data else []
+        if not papers_data:
+            return jsonify({
+                'success': False,
+                'message': 'No papers found'
+            }), 404
+        
+        # One JSONL line per chunk batch, built exactly like the synchronous requests
+        lines = []
+        batch_sizes = {}
+        for paper_idx, paper in enumerate(papers_data):
+            try:
+                clean_text = _load_paper_text(paper)
+            except Exception as e:
+                print(f"Error processing {paper.get('filename', 'unknown')}: {e}")
+                continue
+            if clean_text is None:
+                continue
+            
+            for batch_idx, batch in enumerate(_pack_batches(_split_into_chunks(clean_text))):
+                custom_id = f'{paper_idx}-{batch_idx}'
+                batch_sizes[custom_id] = len(batch)
+                lines.append(json.dumps({
+                    'custom_id': custom_id,
+                    'method': 'POST',
+                    'url': '/v1/chat/completions',
+                    'body': _build_groq_payload(batch)
+                }))
+        
+        if not lines:
+            return jsonify({
+                'success': False,
+                'message': 'No text could be extracted from the uploaded papers'
+            }), 500
+        
+        headers = {'Authorization': f'Bearer {groq_api_key}'}
+        upload = _groq_request(
+            'POST',
+            f'{GROQ_API_BASE}/files',
+            headers=headers,
+            data={'purpose': 'batch'},
+            # bytes rather than a stream, so a retried upload resends the whole file
+            files={'file': ('questions.jsonl', '\n'.join(lines).encode('utf-8'), 'application/jsonl')},
+            timeout=60
+        )
+        upload.raise_for_status()
+        
+        created = _groq_request(
+            'POST',
+            f'{GROQ_API_BASE}/batches',
+            headers=headers,
+            json={
+                'input_file_id': upload.json()['id'],
+                'endpoint': '/v1/chat/completions',
+                'completion_window': '24h'
+            },
+            timeout=60
+        )
+        created.raise_for_status()
+        batch = created.json()
+        
+        create_groq_batch(batch['id'], batch_sizes)
+        print(f"Queued Groq batch {batch['id']} with {len(lines)} requests")
+        
+        return jsonify({
+            'success': True,
+            'message': f'Queued {len(lines)} requests for {len(papers_data)} papers',
+            'batchId': batch['id'],
+            'status': batch.get('status')
+        })
+    
+    except Exception as e:
+        print(f"Generate questions batch error: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to queue question generation: {str(e)}'
+        }), 500
+
+@exam_prep_bp.route('/batch-status/<batch_id>')
+def batch_status(batch_id):
+    """Poll a queued Groq batch and collect its questions once it completes"""
+    try:
+        job = get_groq_batch(batch_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'message': 'Batch not found'
+            }), 404
+        
+        if job['questions_id'] is not None:
+            questions_record = get_question_set(job['questions_id'])
+            return jsonify({
+                'success': True,
+                'status': 'completed',
+                'questionsId': job['questions_id'],
+                'questions': questions_record['questions']
+            })
+        
+        groq_api_key = os.getenv('GROQ_API_KEY')
+        headers = {'Authorization': f'Bearer {groq_api_key}'}
+        response = _groq_request('GET', f'{GROQ_API_BASE}/batches/{batch_id}', headers=headers, timeout=60)
+        response.raise_for_status()
+        batch = response.json()
+        status = batch.get('status')
+        
+        if status != 'completed':
+            failed = status in ('failed', 'expired', 'cancelled')
+            return jsonify({
+                'success': not failed,
+                'status': status,
+                'requestCounts': batch.get('request_counts')
+            }), 500 if failed else 200
+        
+        output = _groq_request('GET', f"{GROQ_API_BASE}/files/{batch['output_file_id']}/content", headers=headers, timeout=60)
+        output.raise_for_status()
+        
+        # Results arrive in any order; restore paper/chunk order from custom_id
+        results = [json.loads(line) for line in output.text.splitlines() if line.strip()]
+        results.sort(key=lambda r: tuple(int(part) for part in r['custom_id'].split('-')))
+        
+        all_questions = []
+        for i, result in enumerate(results):
+            result_response = result.get('response') or {}
+            if result_response.get('status_code') != 200:
+                print(f"Batch request {result['custom_id']} failed: {result.get('error')}")
+                continue
+            try:
+                batch_size = job['batch_sizes'].get(result['custom_id'], 1)
+                all_questions.extend(_questions_from_response(i, batch_size, result_response['body'])[0])
+            except Exception as e:
+                print(f"Error processing request {i + 1}: {e}")
+        
+        if not all_questions:
+            return jsonify({
+                'success': False,
+                'status': status,
+                'message': 'No questions could be generated from the uploaded papers'
+            }), 500
+        
+        # Concurrent polls may both get here; only the first stores the set
+        questions_id = store_groq_batch_questions(batch_id, all_questions)
+        print(f"\n✓ Total: {len(all_questions)} questions collected from batch {batch_id}")
+        
+        return jsonify({
+            'success': True,
+            'status': status,
+            'questionsId': questions_id,
+            'questions': all_questions
+        })
+    
+    except Exception as e:
+        print(f"Batch status error: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Failed to check batch status: {str(e)}'
+        }), 500
+
+@exam_prep_bp.route('/clear-cache', methods=['POST'])
+def clear_cache():
+    """Drop cached Groq responses so the next generation calls the API again (admin only)"""
+    # Disabled unless ADMIN_TOKEN is set; callers send it as a bearer token
+    admin_token = os.getenv('ADMIN_TOKEN')
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not admin_token or not hmac.compare_digest(supplied.encode(), admin_token.encode()):
+        return jsonify({
+            'success': False,
+            'message': 'Forbidden'
+        }), 403
+    
+    try:
+        removed = clear_question_cache()
+        return jsonify({
+            'success': True,
+            'message': f'Cleared {removed} cached responses'
+        })
+    except Exception as e:
+        print(f"Clear cache error: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Failed to clear cache'
+        }), 500
+
+# The questions document is rendered straight to WordprocessingML and zipped
+# into python-docx's default template, instead of building an oxml tree
+_RE_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_RE_RUN_BREAKS = re.compile(r'([\t\n\r])')
+_docx_template = None
+
+def _get_docx_template():
+    """Zip entries of the default .docx plus its document.xml split around the body"""
+    global _docx_template
+    if _docx_template is None:
+        buffer = BytesIO()
+        Document().save(buffer)
+        with zipfile.ZipFile(buffer) as template:
+            entries = [(info, template.read(info)) for info in template.infolist()]
+        document_xml = dict((info.filename, data) for info, data in entries)['word/document.xml'].decode('utf-8')
+        body_start = document_xml.index('<w:body>') + len('<w:body>')
+        body_end = document_xml.index('<w:sectPr', body_start)
+        _docx_template = (entries, document_xml[:body_start], document_xml[body_end:])
+    return _docx_template
+
+def _docx_run(text, bold=False):
+    """A <w:r> for `text`; tabs and line breaks map the same way python-docx's Run.text does"""
+    content = []
+    for piece in _RE_RUN_BREAKS.split(_RE_XML_INVALID.sub('', text)):
+        if piece == '\t':
+            content.append('<w:tab/>')
+        elif piece in ('\n', '\r'):
+            content.append('<w:br/>')
+        elif piece:
+            content.append(f'<w:t xml:space="preserve">{xml_escape(piece)}</w:t>')
+    properties = '<w:rPr><w:b/></w:rPr>' if bold else ''
+    return f'<w:r>{properties}{"".join(content)}</w:r>'
+
+def _docx_paragraph(*runs, style=None):
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+    return f'<w:p>{properties}{"".join(runs)}</w:p>'
+
+def _write_docx(path, body_xml):
+    """Write a .docx whose body is `body_xml` to `path`"""
+    entries, document_head, document_tail = _get_docx_template()
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as out:
+        for info, data in entries:
+            if info.filename == 'word/document.xml':
+                out.writestr(info, f'{document_head}{body_xml}{document_tail}'.encode('utf-8'))
+            else:
+                out.writestr(info, data)
+
 @exam_prep_bp.route('/download-questions/<questions_id>')
 def download_questions(questions_id):
     try:
         # Find questions
-        questions_record = next((q for q in generated_questions if q['id'] == questions_id), None)
+        questions_record = get_question_set(questions_id)
         if not questions_record:
             return jsonify({
                 'success': False,
@@ -604,33 +1206,41 @@ def download_questions(questions_id):
             }), 404
 
         # Create a Word document
-        doc = Document()
-        doc.add_heading('Exam Preparation Questions', 0)
-        doc.add_paragraph(f'Generated on: {questions_record["generated_at"].strftime("%Y-%m-%d %H:%M:%S")}')
-        doc.add_paragraph('')
+        generated_on = questions_record["generated_at"].strftime("%Y-%m-%d %H:%M:%S")
+        body = [
+            _docx_paragraph(_docx_run('Exam Preparation Questions'), style='Title'),
+            _docx_paragraph(_docx_run(f'Generated on: {generated_on}')),
+            _docx_paragraph()
+        ]
 
         for i, q in enumerate(questions_record['questions'], 1):
-            # Add question
-            doc.add_heading(f'Question {i}', level=1)
-            doc.add_paragraph(q['question'])
-            
-            # Add importance level
-            importance_para = doc.add_paragraph()
-            importance_para.add_run('Importance: ').bold = True
-            importance_para.add_run(q['importance'].title())
-            
-            # Add answer
-            doc.add_heading('Answer:', level=2)
-            doc.add_paragraph(q['answer'])
-            doc.add_paragraph('')  # Add spacing
+            body.append(_docx_paragraph(_docx_run(f'Question {i}'), style='Heading1'))
+            body.append(_docx_paragraph(_docx_run(q['question'])))
+            body.append(_docx_paragraph(_docx_run('Importance: ', bold=True), _docx_run(q['importance'].title())))
+            body.append(_docx_paragraph(_docx_run('Answer:'), style='Heading2'))
+            body.append(_docx_paragraph(_docx_run(q['answer'])))
+            body.append(_docx_paragraph())  # Add spacing
+
+        # Save to a temp file so the response streams from disk (sendfile where
+        # the server supports it) instead of copying an in-memory buffer
+        tmp = tempfile.NamedTemporaryFile(suffix='.docx', delete=False)
+        tmp.close()
+
+        # Registered before writing so the file also goes when the write or
+        # send_file fails and the error response below is returned instead
+        @after_this_request
+        def remove_docx(response):
+            # send_file already holds the file open, so unlinking here is safe on POSIX
+            try:
+                os.unlink(tmp.name)
+            except OSError as e:
+                print(f"Could not remove temp file {tmp.name}: {e}")
+            return response
 
-        # Save to BytesIO
-        docx_buffer = BytesIO()
-        doc.save(docx_buffer)
-        docx_buffer.seek(0)
+        _write_docx(tmp.name, ''.join(body))
 
         return send_file(
-            docx_buffer,
+            tmp.name,
             mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
             as_attachment=True,
             download_name=f'exam_questions_{questions_id}.docx'
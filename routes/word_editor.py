@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
+import docx
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -9,14 +10,51 @@ from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
 from reportlab.lib.colors import HexColor
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from copy import deepcopy
+from datetime import datetime, timezone
+from functools import lru_cache
 from io import BytesIO
-from datetime import datetime
+from string import Template
+import blake3
+import itertools
+import logging
+import multiprocessing
+import orjson
+import os
+import re
+import tempfile
+import threading
 
 word_editor_bp = Blueprint('word_editor', __name__)
+logger = logging.getLogger(__name__)
 
-# Simple in-memory document storage for demo
-documents = []
-doc_id_counter = 1
+# Exports stay in memory up to this size, then spill to a temp file
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# python-docx re-reads its bundled template from disk for every Document();
+# keep the bytes and open each export from memory instead
+with open(os.path.join(os.path.dirname(docx.__file__), 'templates', 'default.docx'), 'rb') as _template:
+    DEFAULT_DOCX_BYTES = _template.read()
+
+# Large exports are rendered in worker processes so they don't hold the GIL
+# (and every other request thread) for the whole build
+RENDER_PROCESS_MIN_CHARS = 20000  # Below this, the round trip costs more than it saves
+RENDER_MAX_PROCESSES = min(os.cpu_count() or 1, 4)
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+# Recently rendered exports keyed by their ETag, so repeat downloads skip
+# python-docx/ReportLab; only exports that fit in the spool are kept
+RENDER_CACHE_SIZE = 16
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+# Simple in-memory document storage for demo, keyed by document id
+documents = {}
+_doc_ids = itertools.count(1)  # next() is atomic, unlike a global read-modify-write
 
 DEFAULT_FORMATTING = {
     'fontFamily': 'Arial',
@@ -59,53 +97,68 @@ def inches(value, default=1.0):
         return Inches(default)
 
 
+_RE_HEX_COLOR = re.compile(r'[0-9A-Fa-f]{6}')
+
+
+# The UI only offers a small palette; RGBColor is an immutable tuple
+@lru_cache(maxsize=256)
 def parse_color(color_str):
     if not color_str:
         return None
     color = color_str.lstrip('#')
-    if len(color) != 6:
-        return None
-    try:
-        return RGBColor.from_string(color.upper())
-    except ValueError:
+    # Validate first: bytes.fromhex() skips whitespace, so ' 1234 ' would
+    # decode to two channels, and int(color, 16) accepts signs and underscores
+    if not _RE_HEX_COLOR.fullmatch(color):
         return None
+    return RGBColor(*bytes.fromhex(color))
 
 
-def apply_run_formatting(run, formatting):
-    font = run.font
-    font.name = formatting.get('fontFamily') or DEFAULT_FORMATTING['fontFamily']
+DOCX_ALIGNMENT_MAP = {
+    'left': WD_ALIGN_PARAGRAPH.LEFT,
+    'center': WD_ALIGN_PARAGRAPH.CENTER,
+    'right': WD_ALIGN_PARAGRAPH.RIGHT,
+    'justify': WD_ALIGN_PARAGRAPH.JUSTIFY
+}
+
 
-    font_size = formatting.get('fontSize')
+def resolve_run_formatting(formatting):
+    """Work out the run properties once per export; they are the same for every run"""
     try:
-        font.size = Pt(float(font_size))
+        font_size = Pt(float(formatting.get('fontSize')))
     except (TypeError, ValueError):
-        font.size = Pt(DEFAULT_FORMATTING['fontSize'])
+        font_size = Pt(DEFAULT_FORMATTING['fontSize'])
+
+    return {
+        'name': formatting.get('fontFamily') or DEFAULT_FORMATTING['fontFamily'],
+        'size': font_size,
+        'color': parse_color(formatting.get('fontColor')),
+        'bold': bool(formatting.get('bold')),
+        'italic': bool(formatting.get('italic')),
+        'underline': bool(formatting.get('underline'))
+    }
 
-    color = parse_color(formatting.get('fontColor'))
-    if color:
-        font.color.rgb = color
 
-    run.bold = bool(formatting.get('bold'))
-    run.italic = bool(formatting.get('italic'))
-    run.underline = bool(formatting.get('underline'))
+def apply_run_formatting(run, run_format):
+    font = run.font
+    font.name = run_format['name']
+    font.size = run_format['size']
+    if run_format['color']:
+        font.color.rgb = run_format['color']
 
+    run.bold = run_format['bold']
+    run.italic = run_format['italic']
+    run.underline = run_format['underline']
 
-def apply_paragraph_formatting(paragraph, formatting):
-    pf = paragraph.paragraph_format
-    alignment_map = {
-        'left': WD_ALIGN_PARAGRAPH.LEFT,
-        'center': WD_ALIGN_PARAGRAPH.CENTER,
-        'right': WD_ALIGN_PARAGRAPH.RIGHT,
-        'justify': WD_ALIGN_PARAGRAPH.JUSTIFY
-    }
-    alignment = formatting.get('alignment', DEFAULT_FORMATTING['alignment'])
-    paragraph.alignment = alignment_map.get(alignment, WD_ALIGN_PARAGRAPH.LEFT)
 
+def resolve_paragraph_formatting(formatting):
+    """Return the (alignment, line spacing) pair shared by every paragraph"""
+    alignment = formatting.get('alignment', DEFAULT_FORMATTING['alignment'])
     line_spacing = formatting.get('lineSpacing', DEFAULT_FORMATTING['lineSpacing'])
     try:
-        pf.line_spacing = float(line_spacing)
+        line_spacing = float(line_spacing)
     except (TypeError, ValueError):
-        pf.line_spacing = DEFAULT_FORMATTING['lineSpacing']
+        line_spacing = DEFAULT_FORMATTING['lineSpacing']
+    return DOCX_ALIGNMENT_MAP.get(alignment, WD_ALIGN_PARAGRAPH.LEFT), line_spacing
 
 
 def add_page_numbers(document):
@@ -128,8 +181,8 @@ def add_page_numbers(document):
     run._r.append(fld_char_end)
 
 
-def build_docx_document(doc):
-    document = Document()
+def build_docx_document(doc, buffer=None):
+    document = Document(BytesIO(DEFAULT_DOCX_BYTES))
     formatting = doc.get('formatting', DEFAULT_FORMATTING)
 
     # Apply section margins
@@ -140,30 +193,84 @@ def build_docx_document(doc):
     section.left_margin = inches(margins.get('left', 1))
     section.right_margin = inches(margins.get('right', 1))
 
-    # Add content
-    paragraphs = [p for p in doc.get('content', '').split('\n') if p is not None]
-    for para in paragraphs:
-        text = para.rstrip()
-        paragraph = document.add_paragraph()
-        if text.strip():
-            run = paragraph.add_run(text)
-        else:
-            run = paragraph.add_run(' ')
-        apply_run_formatting(run, formatting)
-        apply_paragraph_formatting(paragraph, formatting)
+    # Formatting is uniform across the document, so resolve it once
+    run_format = resolve_run_formatting(formatting)
+    alignment, line_spacing = resolve_paragraph_formatting(formatting)
+
+    # Style one empty paragraph through python-docx and clone its XML for every
+    # line; only the text differs, so the Paragraph/Run/Font wrappers (and their
+    # per-attribute lookups) run once instead of once per line
+    paragraph = document.add_paragraph()
+    paragraph.alignment = alignment
+    paragraph.paragraph_format.line_spacing = line_spacing
+    apply_run_formatting(paragraph.add_run(), run_format)
+    prototype = deepcopy(paragraph._p)
+
+    # Add content; blank lines still get a run so they keep their height
+    lines = doc.get('content', '').split('\n')
+    last = paragraph._p
+    last.r_lst[0].text = lines[0].rstrip() or ' '
+    for para in lines[1:]:
+        p = deepcopy(prototype)
+        p.r_lst[0].text = para.rstrip() or ' '
+        last.addnext(p)
+        last = p
 
     if formatting.get('pageNumbers'):
         add_page_numbers(document)
 
-    buffer = BytesIO()
+    if buffer is None:
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
     document.save(buffer)
     buffer.seek(0)
     return buffer
 
 
-def build_pdf_document(doc):
+PDF_FONT_FAMILY_MAP = {
+    'Arial': 'Helvetica',
+    'Calibri': 'Helvetica',
+    'Georgia': 'Times-Roman',
+    'Times New Roman': 'Times-Roman'
+}
+
+PDF_ALIGNMENT_MAP = {
+    'left': TA_LEFT,
+    'center': TA_CENTER,
+    'right': TA_RIGHT,
+    'justify': TA_JUSTIFY
+}
+
+
+# Bold/italic variant names of each base font, keyed by (base, bold, italic)
+PDF_FONT_VARIANTS = {
+    ('Helvetica', True, True): 'Helvetica-BoldOblique',
+    ('Helvetica', True, False): 'Helvetica-Bold',
+    ('Helvetica', False, True): 'Helvetica-Oblique',
+    ('Times-Roman', True, True): 'Times-BoldItalic',
+    ('Times-Roman', True, False): 'Times-Bold',
+    ('Times-Roman', False, True): 'Times-Italic'
+}
+
+
+# Styles only depend on these few fields, so repeat exports with unchanged
+# formatting reuse one ParagraphStyle (ReportLab never mutates it)
+@lru_cache(maxsize=128)
+def _pdf_style(font_variant, font_size, line_spacing, alignment, color_hex, underline):
+    return ParagraphStyle(
+        'Custom',
+        fontName=font_variant,
+        fontSize=font_size,
+        leading=font_size * line_spacing,
+        alignment=PDF_ALIGNMENT_MAP.get(alignment, TA_LEFT),
+        textColor=HexColor(color_hex),
+        underline=underline
+    )
+
+
+def build_pdf_document(doc, buffer=None):
     formatting = doc.get('formatting', DEFAULT_FORMATTING)
-    buffer = BytesIO()
+    if buffer is None:
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
 
     margins = formatting.get('margins', DEFAULT_FORMATTING['margins'])
     left_margin = float(margins.get('left', 1)) * 72
@@ -180,81 +287,106 @@ def build_pdf_document(doc):
         bottomMargin=bottom_margin
     )
 
-    font_family_map = {
-        'Arial': 'Helvetica',
-        'Calibri': 'Helvetica',
-        'Georgia': 'Times-Roman',
-        'Times New Roman': 'Times-Roman'
-    }
-
-    base_font = font_family_map.get(formatting.get('fontFamily'), 'Helvetica')
-    font_variant = base_font
-
-    bold = formatting.get('bold')
-    italic = formatting.get('italic')
-
-    if base_font == 'Times-Roman':
-        if bold and italic:
-            font_variant = 'Times-BoldItalic'
-        elif bold:
-            font_variant = 'Times-Bold'
-        elif italic:
-            font_variant = 'Times-Italic'
-    else:
-        # Helvetica/Courier naming
-        if bold and italic:
-            font_variant = f'{base_font}-BoldOblique'
-        elif bold:
-            font_variant = f'{base_font}-Bold'
-        elif italic:
-            font_variant = f'{base_font}-Oblique'
-
-    alignment_map = {
-        'left': TA_LEFT,
-        'center': TA_CENTER,
-        'right': TA_RIGHT,
-        'justify': TA_JUSTIFY
-    }
-
     line_spacing = float(formatting.get('lineSpacing', DEFAULT_FORMATTING['lineSpacing']))
     font_size = float(formatting.get('fontSize', DEFAULT_FORMATTING['fontSize']))
 
-    style = ParagraphStyle(
-        'Custom',
-        fontName=font_variant,
-        fontSize=font_size,
-        leading=font_size * line_spacing,
-        alignment=alignment_map.get(formatting.get('alignment', 'left'), TA_LEFT),
-        textColor=HexColor(formatting.get('fontColor', '#000000')),
-        underline=bool(formatting.get('underline'))
+    base_font = PDF_FONT_FAMILY_MAP.get(formatting.get('fontFamily'), 'Helvetica')
+    style = _pdf_style(
+        PDF_FONT_VARIANTS.get((base_font, bool(formatting.get('bold')), bool(formatting.get('italic'))), base_font),
+        font_size,
+        line_spacing,
+        formatting.get('alignment', 'left'),
+        formatting.get('fontColor', '#000000'),
+        bool(formatting.get('underline'))
     )
 
+    blank_line_height = font_size * 0.6
+    paragraph_gap = font_size * 0.3
+
     elements = []
+    append = elements.append
     for para in doc.get('content', '').split('\n'):
         text = para.strip()
         if not text:
-            elements.append(Spacer(1, font_size * 0.6))
+            append(Spacer(1, blank_line_height))
         else:
-            elements.append(Paragraph(text.replace('\n', '<br/>'), style))
-            elements.append(Spacer(1, font_size * 0.3))
+            append(Paragraph(text, style))
+            append(Spacer(1, paragraph_gap))
 
     pdf_doc.build(elements or [Paragraph(' ', style)])
     buffer.seek(0)
     return buffer
 
-@word_editor_bp.route('/upload-doc', methods=['POST'])
-def upload_doc():
+
+def _render_to_file(build, doc):
+    """Worker-process entry point; file objects don't pickle, so render to a temp file and return its path"""
+    with tempfile.NamedTemporaryFile(suffix='.export', delete=False) as out:
+        try:
+            build(doc, out)
+        except BaseException:
+            out.close()
+            os.unlink(out.name)
+            raise
+    return out.name
+
+
+def _get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn, not fork: the server process is multi-threaded
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_MAX_PROCESSES,
+                                               mp_context=multiprocessing.get_context('spawn'))
+        return _render_pool
+
+
+def render_export(build, doc):
+    """Run `build` on `doc`, in a worker process when the document is large"""
+    if len(doc.get('content', '')) < RENDER_PROCESS_MIN_CHARS:
+        return build(doc)
+
+    global _render_pool
+    pool = _get_render_pool()
     try:
-        print("Upload request received")
-        print("Content-Type:", request.headers.get('Content-Type'))
-        print("Body:", request.get_json())
+        path = pool.submit(_render_to_file, build, doc).result()
+    except BrokenProcessPool:
+        logger.exception("Render worker pool died; building document in-process")
+        with _render_pool_lock:
+            if _render_pool is pool:
+                _render_pool = None
+        return build(doc)
+
+    # Serve straight from the worker's file rather than copying it into memory;
+    # the open handle keeps the data readable after the unlink (POSIX)
+    buffer = open(path, 'rb')
+    os.unlink(path)
+    return buffer
 
-        data = request.get_json()
-        filename = data.get('filename', 'uploaded_document.docx') if data else 'uploaded_document.docx'
-        
-        # Generate realistic document content based on filename
-        if 'resume' in filename.lower() or 'cv' in filename.lower():
-            document_content = """RESUME
+
+def _get_cached_render(key):
+    with _render_cache_lock:
+        data = _render_cache.get(key)
+        if data is not None:
+            _render_cache.move_to_end(key)
+        return data
+
+
+def _cache_render(key, buffer):
+    size = buffer.seek(0, os.SEEK_END)
+    buffer.seek(0)
+    if size > SPOOL_MAX_SIZE:
+        return
+    data = buffer.read()
+    buffer.seek(0)
+    with _render_cache_lock:
+        _render_cache[key] = data
+        _render_cache.move_to_end(key)
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+
+# Canned content for the demo upload, chosen by keywords in the filename;
+# only the letter and default templates vary per request
+RESUME_TEMPLATE = """RESUME
 
 John Doe
 Software Engineer
@@ -284,8 +416,8 @@ ACHIEVEMENTS
 • Published 3 technical articles
 • Speaker at 2 tech conferences
 • AWS Certified Solutions Architect"""
-        elif 'report' in filename.lower() or 'analysis' in filename.lower():
-            document_content = """PROJECT REPORT
+
+REPORT_TEMPLATE = """PROJECT REPORT
 
 Title: Analysis of Student Performance in Online Learning
 
@@ -316,10 +448,10 @@ RECOMMENDATIONS
 • Provide training for both students and faculty
 • Develop hybrid learning models
 • Implement interactive learning tools"""
-        elif 'letter' in filename.lower() or 'application' in filename.lower():
-            document_content = f"""APPLICATION LETTER
 
-[Date: {datetime.now().strftime('%Y-%m-%d')}]
+LETTER_TEMPLATE = Template("""APPLICATION LETTER
+
+[Date: $date]
 
 Dear Hiring Manager,
 
@@ -339,9 +471,9 @@ I am excited about the opportunity to contribute to your organization's continue
 Thank you for your time and consideration.
 
 Sincerely,
-[Your Name]"""
-        else:
-            document_content = f"""DOCUMENT: {filename}
+[Your Name]""")
+
+DEFAULT_TEMPLATE = Template("""DOCUMENT: $filename
 
 This is a sample document that demonstrates the Word Editor functionality.
 
@@ -364,23 +496,47 @@ This document demonstrates how uploaded content would appear in the Word Editor.
 
 ---
 Document Information:
-- Filename: {filename}
-- Upload Date: {datetime.now().strftime('%Y-%m-%d')}
-- Processing Status: Complete"""
+- Filename: $filename
+- Upload Date: $date
+- Processing Status: Complete""")
+
+UPLOAD_TEMPLATES = {
+    ('resume', 'cv'): RESUME_TEMPLATE,
+    ('report', 'analysis'): REPORT_TEMPLATE,
+    ('letter', 'application'): LETTER_TEMPLATE
+}
+
+@word_editor_bp.route('/upload-doc', methods=['POST'])
+def upload_doc():
+    try:
+        logger.debug("Upload request received (Content-Type: %s)", request.headers.get('Content-Type'))
+        data = request.get_json()
+        logger.debug("Body: %s", data)
+        filename = data.get('filename', 'uploaded_document.docx') if data else 'uploaded_document.docx'
+        now = datetime.now(timezone.utc)
+        
+        # Generate realistic document content based on filename
+        lowered = filename.lower()
+        template = next(
+            (content for keywords, content in UPLOAD_TEMPLATES.items() if any(k in lowered for k in keywords)),
+            DEFAULT_TEMPLATE
+        )
+        if isinstance(template, Template):
+            document_content = template.substitute(filename=filename, date=now.strftime('%Y-%m-%d'))
+        else:
+            document_content = template
 
-        global doc_id_counter
         new_doc = {
-            'id': str(doc_id_counter),
+            'id': str(next(_doc_ids)),
             'filename': filename,
             'content': document_content,
-            'uploaded_at': datetime.utcnow(),
+            'uploaded_at': now,
             'formatting': DEFAULT_FORMATTING.copy()
         }
 
-        documents.append(new_doc)
-        doc_id_counter += 1
+        documents[new_doc['id']] = new_doc
 
-        print("Document created successfully:", new_doc['id'])
+        logger.debug("Document created successfully: %s", new_doc['id'])
 
         return jsonify({
             'success': True,
@@ -404,8 +560,11 @@ def edit_doc():
         formatting = data.get('formatting', {})
         content = data.get('content')
 
-        # Find document
-        doc = next((d for d in documents if d['id'] == document_id), None)
+        # Find document; ids are strings, but clients may send them as JSON
+        # numbers, and lists/objects would not even hash
+        if isinstance(document_id, int) and not isinstance(document_id, bool):
+            document_id = str(document_id)
+        doc = documents.get(document_id) if isinstance(document_id, str) else None
         if not doc:
             return jsonify({
                 'success': False,
@@ -415,18 +574,25 @@ def edit_doc():
         doc['formatting'] = merge_formatting(doc.get('formatting', DEFAULT_FORMATTING), formatting)
         if isinstance(content, str):
             doc['content'] = content
-            print(f"Content updated. New length: {len(content)}")
-            print(f"Content preview (first 200 chars): {content[:200]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Content updated. New length: %d", len(content))
+                logger.debug("Content preview (first 200 chars): %.200s", content)
 
         # In production, apply formatting using python-docx or similar
-        print("Applying formatting:", doc['formatting'])
-        print(f"Document state after edit - Content length: {len(doc.get('content', ''))}, Formatting keys: {list(doc.get('formatting', {}).keys())}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Applying formatting: %s", doc['formatting'])
+            logger.debug("Document state after edit - Content length: %d, Formatting keys: %s",
+                         len(doc.get('content', '')), list(doc['formatting']))
 
-        return jsonify({
+        # The editor keeps its own copy of the text; only echo it back on request
+        result = {
             'success': True,
             'message': 'Document formatting applied successfully',
-            'preview': doc['content']
-        })
+            'preview_length': len(doc['content'])
+        }
+        if request.args.get('include_preview') == '1':
+            result['preview'] = doc['content']
+        return jsonify(result)
 
     except Exception as e:
         print(f"Edit document error: {e}")
@@ -439,7 +605,7 @@ def edit_doc():
 def download_doc(document_id):
     try:
         # Find document
-        doc = next((d for d in documents if d['id'] == document_id), None)
+        doc = documents.get(document_id)
         if not doc:
             return jsonify({
                 'success': False,
@@ -448,28 +614,56 @@ def download_doc(document_id):
 
         export_format = request.args.get('format', 'docx').lower()
         original_name = doc['filename']
-        
+
+        # An export only depends on the stored document, so clients that
+        # already have this rendering can revalidate without a rebuild. The
+        # ETag is weak: it names the document state, not exact bytes, since
+        # zip timestamps and PDF ids change on every render
+        etag = blake3.blake3(orjson.dumps([export_format, doc], option=orjson.OPT_SORT_KEYS)).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            return response
+
         # Debug: Log what content and formatting we're using
-        print(f"Downloading document {document_id}")
-        print(f"Content length: {len(doc.get('content', ''))}")
-        print(f"Content preview (first 200 chars): {doc.get('content', '')[:200]}")
-        print(f"Formatting: {doc.get('formatting', {})}")
+        if logger.isEnabledFor(logging.DEBUG):
+            content = doc.get('content', '')
+            logger.debug("Downloading document %s", document_id)
+            logger.debug("Content length: %d", len(content))
+            logger.debug("Content preview (first 200 chars): %.200s", content)
+            logger.debug("Formatting: %s", doc.get('formatting', {}))
 
         if export_format == 'pdf':
-            file_buffer = build_pdf_document(doc)
+            build = build_pdf_document
             mimetype = 'application/pdf'
             download_name = f"{original_name.rsplit('.', 1)[0]}_edited.pdf"
         else:
-            file_buffer = build_docx_document(doc)
+            build = build_docx_document
             mimetype = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
             download_name = f"{original_name.rsplit('.', 1)[0]}_edited.docx"
 
-        return send_file(
+        cached = _get_cached_render(etag)
+        if cached is not None:
+            file_buffer = BytesIO(cached)
+        else:
+            file_buffer = render_export(build, doc)
+            _cache_render(etag, file_buffer)
+
+        # send_file can only size in-memory buffers or paths itself; pass the
+        # spooled file's size on so Content-Length is still set. Ranges are not
+        # offered: a weak ETag can't guarantee a resumed download gets the same bytes
+        size = file_buffer.seek(0, os.SEEK_END)
+        file_buffer.seek(0)
+        response = send_file(
             file_buffer,
             mimetype=mimetype,
             as_attachment=True,
-            download_name=download_name
+            download_name=download_name,
+            conditional=False
         )
+        response.content_length = size
+        response.set_etag(etag, weak=True)
+        return response
 
     except Exception as e:
         print(f"Download document error: {e}")
@@ -0,0 +1,26 @@
+import unittest
+
+from docx.shared import RGBColor
+
+from routes.word_editor import parse_color
+
+
+class ParseColorTest(unittest.TestCase):
+    def test_hex_colors(self):
+        self.assertEqual(parse_color('#1A2b3C'), RGBColor(0x1A, 0x2B, 0x3C))
+        self.assertEqual(parse_color('000000'), RGBColor(0, 0, 0))
+
+    def test_rejects_whitespace_that_decodes_short(self):
+        # bytes.fromhex(' 1234 ') is two bytes, which RGBColor cannot take
+        self.assertIsNone(parse_color('# 1234 '))
+        self.assertIsNone(parse_color(' 1234 '))
+        self.assertIsNone(parse_color('12 345'))
+
+    def test_rejects_malformed_values(self):
+        for value in ('', None, '#12345', '#1234567', '#-12345', '#1_2345', '#GGGGGG'):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_color(value))
+
+
+if __name__ == '__main__':
+    unittest.main()